@@ -1,30 +1,81 @@
 #!/usr/bin/env python3
 """FastAPI Backend for 10-K Distress Analysis"""
 
-from typing import Optional
-from fastapi import FastAPI, HTTPException
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import List, Literal, Optional
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-
-from src.data.sec_client import SECClient
-from src.parsers.parser import Parser
-from src.models.bankruptcy_score import get_ohlson_oscore
-from src.features.ratios_and_trends import (
-    get_liquidity_ratios, 
-    get_leverage_ratios, 
-    get_profitability_ratios, 
-    get_cash_flow_ratios,
-    get_revenue_pct_change,
-    get_net_income_pct_change
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+
+from src.data.archive import ArchiveMissError
+from src.data.sec_client import SECClient, shared_companies
+from src.data.snapshot import restore_snapshot, run_snapshot_writer
+from src.data.ticker_index import get_ticker_index
+from src.pipeline.analyzer import analyze, TickerNotFoundError, UnsupportedFilerError
+from src.pipeline.batch import BATCH_MAX_TICKERS, analyze_batch, screen
+from src.pipeline.deadline import (
+    ANALYZE_TIMEOUT,
+    Deadline,
+    DeadlineExceeded,
+    RequestCancelled,
+    run_with_deadline,
+)
+from src.pipeline.formats import NotAcceptableError, accepts_gzip, encode, negotiate
+from src.scoring.score_store import ScoreStore
+from src.watchlist.push import SSE_KEEPALIVE_SECONDS, SSE_MAX_TICKERS, ScoreBroadcaster, format_sse
+from src.watchlist.scheduler import WatchlistScheduler, run_scheduler
+from src.monitoring.metrics import (
+    HTTP_REQUEST_SECONDS,
+    format_server_timing,
+    render_prometheus,
+    start_request_timings,
 )
-from src.scoring.composite_score import calculate_composite
-from src.scoring.interpreter import get_recommendation
+from src.monitoring.profiling import is_admin, run_profiled
+
+# Attach per-stage Server-Timing headers to responses (off by default)
+SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+
+# How often a running request checks whether its client has disconnected
+DISCONNECT_POLL_SECONDS = 0.25
+
+# Latest score per company, with SIC industry distributions for peer ranking
+score_store = ScoreStore()
+
+# Server-side watchlist, re-checked at each company's alert-level cadence
+watchlist = WatchlistScheduler(store=score_store)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Serve the latest snapshot, then run the watchlist scheduler and snapshot writer"""
+    restore_snapshot(score_store)
+    app.state.watchlist_wakeup = asyncio.Event()
+    tasks = [
+        asyncio.create_task(run_scheduler(watchlist, app.state.watchlist_wakeup)),
+        asyncio.create_task(run_snapshot_writer(score_store)),
+    ]
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
 # Initialize FastAPI
 app = FastAPI(
     title="10-K Distress Analysis API",
     description="Financial distress analysis using SEC 10-K data",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Enable CORS for frontend (Vercel and local development)
@@ -40,13 +91,71 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class RequestMetricsMiddleware:
+    """
+    Record request latency and optionally expose stage timings
+
+    Plain ASGI rather than @app.middleware("http"), which hides client
+    disconnects from endpoints and so would keep cancelled work running
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        timings = start_request_timings() if SERVER_TIMING_ENABLED else None
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timings(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                if timings:
+                    MutableHeaders(scope=message).append('Server-Timing', format_server_timing(timings))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            # Use the route template so path parameters don't explode label cardinality
+            route = scope.get('route')
+            path = getattr(route, 'path', 'unmatched')
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, path=path, status=status)
+
+app.add_middleware(RequestMetricsMiddleware)
+
+@app.exception_handler(ArchiveMissError)
+async def archive_miss_handler(request: Request, exc: ArchiveMissError):
+    """Replay mode hit a URL the archive never recorded; a server problem, not a bad ticker"""
+    return JSONResponse(status_code=503, content={"detail": f"Replay archive incomplete: {exc}"})
+
 # Request/Response Models
 class AnalyzeRequest(BaseModel):
     ticker: str
+    basis: Literal['annual', 'ttm'] = 'annual'
+    profile: bool = False
+    uncertainty: bool = False
+    timeout: Optional[float] = Field(None, gt=0)
+
+class BatchRequest(BaseModel):
+    tickers: List[str]
+    basis: Literal['annual', 'ttm'] = 'annual'
+    timeout: Optional[float] = Field(None, gt=0)
+
+class WatchRequest(BaseModel):
+    ticker: str
 
 class AnalysisResponse(BaseModel):
     ticker: str
     cik: str
+    company_name: Optional[str] = None
+    sic: Optional[str] = None
+    sic_description: Optional[str] = None
+    basis: str = 'annual'
     current_year: str
     prior_year: Optional[str]
     score: float
@@ -59,6 +168,40 @@ class AnalysisResponse(BaseModel):
     metrics: dict
     financials: dict
     data_quality: dict
+    peer_percentiles: Optional[dict] = None
+    uncertainty: Optional[dict] = None
+    profile: Optional[dict] = None
+
+def _render_score(result: dict) -> dict:
+    """Stored result as an /analyze response body, for pushed updates"""
+    response = AnalysisResponse(**dict(result, peer_percentiles=score_store.peer_percentiles(result), profile=None))
+    return jsonable_encoder(response)
+
+# Pushes changed scores to /scores/stream subscribers
+score_broadcaster = ScoreBroadcaster(render=_render_score)
+score_store.add_listener(score_broadcaster.on_score)
+
+def _request_deadline(timeout: Optional[float], limit: Optional[float] = ANALYZE_TIMEOUT) -> Deadline:
+    """Deadline from the requested timeout, capped at the server limit (if any)"""
+    if timeout is None or (limit is not None and timeout > limit):
+        timeout = limit
+    return Deadline(timeout)
+
+async def run_cancellable(request: Request, deadline: Deadline, fn, *args, **kwargs):
+    """
+    Run blocking pipeline work in a worker thread under a deadline
+    Cancels the deadline if the client disconnects, so the work stops at its next check
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, run_with_deadline, deadline, fn, *args, **kwargs)
+    future = loop.run_in_executor(None, call)
+    while True:
+        done, _ = await asyncio.wait({future}, timeout=DISCONNECT_POLL_SECONDS)
+        if done:
+            return future.result()
+        if not deadline.cancelled and await request.is_disconnected():
+            deadline.cancel()
 
 # Health check endpoint
 @app.get("/health")
@@ -66,126 +209,239 @@ async def health_check():
     """Check if API is running"""
     return {"status": "ok", "message": "10-K Analysis API is running"}
 
+# Metrics endpoint
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+# Typeahead endpoint
+@app.get("/search")
+def search_companies(q: str = Query(..., min_length=1, max_length=64), limit: int = Query(10, ge=1, le=50)):
+    """
+    Ticker and company-name prefix/fuzzy search for typeahead
+    """
+    companies = shared_companies()
+    if not companies:
+        raise HTTPException(status_code=503, detail="Company list is unavailable")
+
+    # Rebuilt only when the shared CIK map is reloaded
+    index = get_ticker_index(companies)
+    return {"query": q, "results": index.search(q, limit)}
+
+# Bulk endpoints (columnar JSON, gzip or Arrow via content negotiation)
+def _negotiate_bulk(accept: Optional[str], format_name: Optional[str]) -> str:
+    """Media type for a bulk response, or 406 before any work is done"""
+    try:
+        return negotiate(accept, format_name)
+    except NotAcceptableError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+def _bulk_response(results: list, media_type: str, accept_encoding: Optional[str]) -> Response:
+    body, headers = encode(results, media_type, gzip_ok=accepts_gzip(accept_encoding))
+    return Response(content=body, media_type=media_type, headers=headers)
+
+@app.post("/analyze/batch")
+async def analyze_tickers(
+    request: BatchRequest,
+    http_request: Request,
+    format: Optional[str] = Query(None),
+    accept: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    """
+    Analyze many tickers at once; one row per ticker with a status column
+    Annual results also update the score store used by /scores and peer percentiles
+
+    timeout bounds the whole batch (none by default); each ticker also has
+    its own BATCH_TICKER_TIMEOUT. Tickers that run out of time get status
+    'timeout' and the rest of the batch is still returned.
+    """
+    if len(request.tickers) > BATCH_MAX_TICKERS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_TICKERS} tickers per batch")
+    media_type = _negotiate_bulk(accept, format)
+
+    deadline = _request_deadline(request.timeout, limit=None)
+    batch = functools.partial(analyze_batch, basis=request.basis, store=score_store, deadline=deadline)
+    results = await run_cancellable(http_request, deadline, batch, request.tickers)
+    return _bulk_response(results, media_type, accept_encoding)
+
+@app.get("/scores")
+def screen_scores(
+    grade: Optional[List[str]] = Query(None),
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    sic: Optional[str] = None,
+    alert_level: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    format: Optional[str] = Query(None),
+    accept: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    """
+    Screen every stored score, most distressed first
+    """
+    media_type = _negotiate_bulk(accept, format)
+    results = screen(score_store, grades=grade, min_score=min_score, max_score=max_score,
+                     sic=sic, alert_level=alert_level, limit=limit)
+    return _bulk_response(results, media_type, accept_encoding)
+
+def _resolve_tickers(tickers: list) -> tuple:
+    """
+    ({ticker: cik}, [unknown tickers]) for a stream subscription
+    """
+    client = SECClient()
+    ciks = {}
+    unknown = []
+    for ticker in tickers:
+        try:
+            ciks[ticker] = client.get_cik(ticker)
+        except ValueError:
+            unknown.append(ticker)
+    return ciks, unknown
+
+@app.get("/scores/stream")
+async def stream_scores(tickers: str, http_request: Request):
+    """
+    Server-sent events with the latest score for each ticker, then every change
+
+    tickers is comma-separated; the tickers are held on the server-side
+    watchlist while the stream is open, so clients watching the same
+    companies share one re-check schedule.
+    Events: 'subscribed' (tickers and unknown tickers), then 'score' with
+    an /analyze response body for each stored score and each later change
+    """
+    requested = list(dict.fromkeys(t.strip().upper() for t in tickers.split(',') if t.strip()))
+    if not requested:
+        raise HTTPException(status_code=400, detail="No tickers provided")
+    if len(requested) > SSE_MAX_TICKERS:
+        raise HTTPException(status_code=400, detail=f"At most {SSE_MAX_TICKERS} tickers per subscription")
+
+    # A cold or expired CIK map is downloaded, so resolve off the event loop
+    ciks, unknown = await run_in_threadpool(_resolve_tickers, requested)
+    if not ciks:
+        raise HTTPException(status_code=404, detail="None of the tickers were found")
+
+    async def events():
+        # Held and subscribed inside the generator, so the finally below always undoes it
+        for ticker, cik in ciks.items():
+            watchlist.hold(ticker, cik)
+        http_request.app.state.watchlist_wakeup.set()
+        # Subscribe before reading the store so no change in between is missed
+        subscription = score_broadcaster.subscribe(ciks.values())
+        try:
+            yield format_sse('subscribed', json.dumps({'tickers': list(ciks), 'unknown': unknown}))
+            for cik in ciks.values():
+                result = score_store.get(cik)
+                if result is not None:
+                    yield format_sse('score', json.dumps(_render_score(result)))
+            while True:
+                messages = await subscription.next_messages(SSE_KEEPALIVE_SECONDS)
+                if not messages:
+                    # Keeps proxies from closing an idle connection
+                    yield ": keepalive\n\n"
+                for message in messages:
+                    yield message
+        finally:
+            score_broadcaster.unsubscribe(subscription)
+            for ticker in ciks:
+                watchlist.release(ticker)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/scores/{ticker}", response_model=AnalysisResponse)
+def get_stored_score(ticker: str):
+    """
+    Latest stored annual analysis for a ticker, without contacting the SEC
+    (served from memory or the startup snapshot)
+    """
+    try:
+        cik = SECClient().get_cik(ticker)
+    except ValueError:
+        raise HTTPException(status_code=404, detail=f"Ticker {ticker.upper()} not found")
+
+    result = score_store.get(cik)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"No stored score for {ticker.upper()}")
+    return AnalysisResponse(**dict(result, peer_percentiles=score_store.peer_percentiles(result), profile=None))
+
+# Watchlist endpoints
+@app.get("/watchlist")
+async def get_watchlist():
+    """Watched companies with their current grade and next scheduled check"""
+    return {"companies": watchlist.list()}
+
+@app.post("/watchlist")
+async def add_to_watchlist(request: WatchRequest, http_request: Request):
+    """Watch a ticker; it is evaluated right away and then at its alert-level cadence"""
+    entry = watchlist.add(request.ticker)
+    http_request.app.state.watchlist_wakeup.set()
+    return entry
+
+@app.delete("/watchlist/{ticker}")
+async def remove_from_watchlist(ticker: str):
+    """Stop watching a ticker"""
+    if not watchlist.remove(ticker):
+        raise HTTPException(status_code=404, detail=f"{ticker.upper()} is not on the watchlist")
+    return {"status": "removed", "ticker": ticker.upper()}
+
+@app.get("/watchlist/events")
+async def get_watchlist_events(since: int = 0):
+    """Grade-change (and unwatch) events after the given event id"""
+    return {"events": watchlist.events_since(since)}
+
 # Main endpoint
 @app.post("/analyze", response_model=AnalysisResponse)
-async def analyze_ticker(request: AnalyzeRequest):
+async def analyze_ticker(request: AnalyzeRequest, http_request: Request, x_admin_token: Optional[str] = Header(None)):
     """
     Analyze a company ticker for financial distress
     
     Returns comprehensive financial metrics, distress score, and investment recommendation
+    uncertainty=true adds Monte Carlo confidence bands for the score and grade
+    Admins may set profile=true to run the analysis under the profiler
+    The work stops early if the client disconnects or the timeout (ANALYZE_TIMEOUT at most) passes
     """
-    ticker = request.ticker.upper()
-    
+    if request.profile and not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Profiling requires a valid admin token")
+
+    deadline = _request_deadline(request.timeout)
     try:
-        # Fetch SEC data
-        client = SECClient()
-        cik = client.get_cik(ticker)
-        
-        if not cik:
-            raise HTTPException(status_code=404, detail=f"Ticker {ticker} not found")
-        
-        data = client.get_latest_10k(ticker)
-        
-        # Parse data
-        parser = Parser()
-        parsed = parser.parse(data)
-        
-        # Check data quality
-        filing_info = client.get_latest_10k_filing_info(ticker)
-        is_stale = False
-        filing_year = None
-        data_fy = parsed.get('fiscal_years', {}).get('current_year')
-        
-        if filing_info and data_fy:
-            filing_year = int(filing_info['reportDate'][:4])
-            if (filing_year - data_fy) >= 2:
-                is_stale = True
-        
-        # Get fiscal years
-        fiscal_years = parsed.get('fiscal_years', {})
-        current_fy = fiscal_years.get('current_year', 'N/A')
-        prior_fy = fiscal_years.get('prior_year')
-        
-        # Combine facts
-        facts = {}
-        facts.update(parsed['balance_sheet'])
-        facts.update(parsed['income_statement'])
-        facts.update(parsed['cash_flow'])
-        
-        # Handle missing data
-        if 'inventory' not in facts or facts['inventory'] is None:
-            facts['inventory'] = 0
-        if 'capital_expenditure' not in facts or facts['capital_expenditure'] is None:
-            facts['capital_expenditure'] = 0
-        
-        # Check if financial institution missing key tags
-        if 'current_assets' not in facts or 'current_liabilities' not in facts:
-            raise HTTPException(
-                status_code=400, 
-                detail="Required financial data not found in 10-K filing. This typically occurs with banks, insurance companies, or incomplete filings."
+        if request.profile:
+            result, report = await run_cancellable(
+                http_request, deadline, run_profiled, analyze, request.ticker,
+                basis=request.basis, uncertainty=request.uncertainty
             )
-        
-        # Calculate metrics
-        o_score = get_ohlson_oscore(facts)
-        liq = get_liquidity_ratios(facts)
-        lev = get_leverage_ratios(facts)
-        prof = get_profitability_ratios(facts)
-        cf = get_cash_flow_ratios(facts)
-        
-        revenue_growth = get_revenue_pct_change(facts)
-        ni_growth = get_net_income_pct_change(facts)
-        
-        # Composite score
-        composite_result = calculate_composite(facts)
-        score = composite_result['score']
-        
-        # Recommendation
-        rec = get_recommendation(score)
-        
-        # Parse hold and new_investment responses
-        hold_position = rec['hold'].lower() in ['yes', 'review']
-        new_investment = rec['new_investment'].lower() in ['consider', 'maybe']
-        
-        # Build response
-        return AnalysisResponse(
-            ticker=ticker,
-            cik=cik,
-            current_year=f"FY{current_fy}",
-            prior_year=f"FY{prior_fy}" if prior_fy else None,
-            score=round(score, 2),
-            grade=composite_result['grade'],
-            risk_level=composite_result['risk_level'],
-            recommendation=rec['rating'],
-            alert_level=rec['alert_level'],
-            hold_position=hold_position,
-            new_investment=new_investment,
-            metrics={
-                "ohlson_o_score": round(o_score, 3),
-                "current_ratio": round(liq['current_ratio'], 2),
-                "quick_ratio": round(liq['quick_ratio'], 2),
-                "debt_to_equity": round(lev['debt_to_equity'], 2),
-                "interest_coverage": round(lev['interest_coverage_ratio'], 2),
-                "roa": round(prof['ROA'], 2),
-                "net_profit_margin": round(prof['net_profit_margin'], 3),
-                "operating_cf_ratio": round(cf['operating_cash_flow'], 2),
-                "free_cf_to_assets": round(cf['free_cash_flow_to_assets'], 3),
-                "revenue_growth": round(revenue_growth, 2) if revenue_growth is not None else None,
-                "net_income_growth": round(ni_growth, 2) if ni_growth is not None else None,
-            },
-            financials={
-                "total_assets": facts.get('total_assets', 0),
-                "revenue": facts.get('revenue_current', 0),
-                "net_income": facts.get('net_income_current', 0),
-                "operating_cash_flow": facts.get('operating_cash_flow', 0),
-            },
-            data_quality={
-                "is_stale": is_stale,
-                "filing_year": filing_year,
-                "data_year": data_fy,
-            }
-        )
-        
-    except HTTPException:
+        else:
+            report = None
+            result = await run_cancellable(
+                http_request, deadline, analyze, request.ticker,
+                basis=request.basis, uncertainty=request.uncertainty
+            )
+
+        # The store tracks annual scores; TTM results are ranked against them
+        # Confidence bands are per request and are not stored with the score
+        bands = result.pop('uncertainty', None)
+        if request.basis == 'annual':
+            result = score_store.put(result)
+
+        # The profiler report is for the requesting admin only, never stored or pushed
+        return AnalysisResponse(**dict(result, peer_percentiles=score_store.peer_percentiles(result),
+                                       uncertainty=bands, profile=report))
+
+    except TickerNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except UnsupportedFilerError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except RequestCancelled as e:
+        # Client Closed Request; nobody is there to read it
+        raise HTTPException(status_code=499, detail=str(e))
+    except (HTTPException, ArchiveMissError):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
@@ -0,0 +1,27 @@
+"""Run a historical backtest: python -m src.backtest <archive-or-directory>"""
+
+import argparse
+import json
+import os
+
+from src.backtest.engine import SCORE_JUMP, run_backtest
+from src.backtest.panel import iter_archive, iter_directory
+from src.data.archive import ResponseArchive
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the distress score against later outcomes")
+    parser.add_argument('source', help="SECClient record archive or a directory of companyfacts JSON files")
+    parser.add_argument('--score-jump', type=float, default=SCORE_JUMP, help="Score rise that counts as a jump")
+    args = parser.parse_args()
+
+    if os.path.exists(os.path.join(args.source, 'index.jsonl')):
+        payloads = iter_archive(ResponseArchive(args.source))
+    else:
+        payloads = iter_directory(args.source)
+
+    print(json.dumps(run_backtest(payloads, score_jump=args.score_jump), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+import time
+
+import numpy as np
+
+from src.backtest.panel import build_panel
+from src.scoring import vectorized
+
+# A rise of this many points in the composite score by the next 10-K counts as a jump
+SCORE_JUMP = 10.0
+
+# Grade D or worse (score > 50) flags a company as distressed
+FLAG_SCORE = 50.0
+
+# Ohlson's own cut-off for high bankruptcy risk
+FLAG_OSCORE = 0.5
+
+# A company whose last 10-K is this much older than the newest in the panel
+# is treated as having stopped filing (delisted, deregistered or bankrupt)
+STOPPED_FILING_DAYS = 548
+
+
+def _rank(values):
+    """
+    Average ranks (ties share the mean rank), as used by Spearman's rho
+    """
+    order = np.argsort(values, kind='mergesort')
+    sorted_values = values[order]
+    _, inverse, counts = np.unique(sorted_values, return_inverse=True, return_counts=True)
+    ends = np.cumsum(counts)
+    average = ends - (counts - 1) / 2.0
+    ranks = np.empty(len(values), dtype=float)
+    ranks[order] = average[inverse]
+    return ranks
+
+
+def spearman(x, y) -> float:
+    """
+    Spearman rank correlation over rows where both x and y are finite
+    """
+    mask = np.isfinite(x) & np.isfinite(y)
+    if mask.sum() < 3:
+        return None
+    rx, ry = _rank(x[mask]), _rank(y[mask])
+    if rx.std() == 0 or ry.std() == 0:
+        return None
+    return float(np.corrcoef(rx, ry)[0, 1])
+
+
+def _hit_rates(flagged, event, eligible) -> dict:
+    flagged = flagged & eligible
+    event = event & eligible
+    n_flagged = int(flagged.sum())
+    n_events = int(event.sum())
+    n = int(eligible.sum())
+    hits = int((flagged & event).sum())
+    base_rate = n_events / n if n else None
+    hit_rate = hits / n_flagged if n_flagged else None
+    return {
+        'flagged': n_flagged,
+        'events': n_events,
+        'hits': hits,
+        'hit_rate': hit_rate,
+        'base_rate': base_rate,
+        'recall': hits / n_events if n_events else None,
+        'lift': hit_rate / base_rate if hit_rate is not None and base_rate else None,
+    }
+
+
+def score_panel(panel: dict) -> dict:
+    """
+    Composite score, grade and O-Score for every company-year in one pass
+    """
+    result = vectorized.calculate_composite(panel)
+    supported = ~np.isnan(panel['current_assets']) & ~np.isnan(panel['current_liabilities'])
+    result['score'] = np.where(supported, result['score'], np.nan)
+    return result
+
+
+def outcomes(panel: dict, scores: dict, score_jump: float = SCORE_JUMP) -> dict:
+    """
+    What happened by each company's next 10-K: downgrade, score jump, or no further filings
+
+    eligible marks rows whose outcome is observable (a next-year score exists,
+    or the company stopped filing long enough ago to be sure)
+    """
+    order = np.lexsort((panel['fy'], panel['cik']))
+    cik = panel['cik'][order]
+    fy = panel['fy'][order]
+    as_of = panel['as_of'][order]
+    score = scores['score'][order]
+    grade = vectorized.grade_index(score)
+
+    n = len(order)
+    next_index = np.minimum(np.arange(n) + 1, max(n - 1, 0))
+    same_company = np.zeros(n, dtype=bool)
+    if n > 1:
+        same_company[:-1] = cik[:-1] == cik[1:]
+
+    has_next = same_company & (fy[next_index] == fy + 1) & ~np.isnan(score[next_index]) & ~np.isnan(score)
+    next_score = np.where(has_next, score[next_index], np.nan)
+
+    downgrade = has_next & (grade[next_index] > grade)
+    with np.errstate(invalid='ignore'):
+        jump = has_next & (next_score - score >= score_jump)
+
+    cutoff = as_of.max() - np.timedelta64(STOPPED_FILING_DAYS, 'D') if n else None
+    stopped = ~same_company & (as_of < cutoff) & ~np.isnan(score) if n else np.zeros(0, dtype=bool)
+
+    # Undo the sort so outcomes line up with the panel rows
+    unsort = np.empty(n, dtype=np.int64)
+    unsort[order] = np.arange(n)
+    return {
+        'eligible': (has_next | stopped)[unsort],
+        'downgrade': downgrade[unsort],
+        'score_jump': jump[unsort],
+        'stopped_filing': stopped[unsort],
+        'score_change': (next_score - score)[unsort],
+    }
+
+
+def evaluate(panel: dict, scores: dict, score_jump: float = SCORE_JUMP) -> dict:
+    """
+    Hit rates and rank correlations of the composite score and O-Score
+    against next-filing outcomes
+    """
+    result = outcomes(panel, scores, score_jump)
+    eligible = result['eligible']
+    trouble = result['downgrade'] | result['score_jump'] | result['stopped_filing']
+
+    score = scores['score']
+    oscore = np.where(np.isnan(score), np.nan, scores['ohlson'])
+    flagged_score = np.nan_to_num(score, nan=-np.inf) > FLAG_SCORE
+    flagged_oscore = np.nan_to_num(oscore, nan=-np.inf) > FLAG_OSCORE
+
+    eligible_score = np.where(eligible, score, np.nan)
+    eligible_oscore = np.where(eligible, oscore, np.nan)
+    trouble_float = trouble.astype(float)
+
+    metrics = {'eligible_company_years': int(eligible.sum())}
+    for name, event in (
+        ('any_trouble', trouble),
+        ('downgrade', result['downgrade']),
+        ('score_jump', result['score_jump']),
+        ('stopped_filing', result['stopped_filing']),
+    ):
+        metrics[name] = {
+            'composite': _hit_rates(flagged_score, event, eligible),
+            'ohlson': _hit_rates(flagged_oscore, event, eligible),
+        }
+
+    metrics['rank_correlation'] = {
+        'composite_vs_trouble': spearman(eligible_score, trouble_float),
+        'ohlson_vs_trouble': spearman(eligible_oscore, trouble_float),
+        'composite_vs_next_score_change': spearman(eligible_score, result['score_change']),
+        'ohlson_vs_next_score_change': spearman(eligible_oscore, result['score_change']),
+    }
+    return metrics
+
+
+def run_backtest(company_facts_iter, score_jump: float = SCORE_JUMP, alt_tags: dict = None) -> dict:
+    """
+    Rebuild point-in-time scores for every company-year and evaluate them
+    """
+    start = time.perf_counter()
+    panel = build_panel(company_facts_iter, alt_tags)
+    built = time.perf_counter()
+
+    scores = score_panel(panel)
+    metrics = evaluate(panel, scores, score_jump)
+    finished = time.perf_counter()
+
+    metrics['company_years'] = int(len(panel['fy']))
+    metrics['scored_company_years'] = int((~np.isnan(scores['score'])).sum())
+    metrics['companies'] = int(len(np.unique(panel['cik']))) if len(panel['cik']) else 0
+    metrics['timing_seconds'] = {
+        'build_panel': round(built - start, 3),
+        'score_and_evaluate': round(finished - built, 3),
+    }
+    return metrics
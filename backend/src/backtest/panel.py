@@ -0,0 +1,190 @@
+import glob
+import gzip
+import json
+import os
+
+import numpy as np
+
+from src.data.frames import (
+    BALANCE_SHEET_FIELDS,
+    CASH_FLOW_FIELDS,
+    INCOME_STATEMENT_FIELDS,
+    MULTI_YEAR_FIELDS,
+)
+from src.parsers.parser import NONCURRENT_LIABILITY_TAGS, Parser
+
+TEN_K_FORMS = ('10-K', '10-K/A')
+
+# Panel column -> (alt_tags category, field)
+_SINGLE_YEAR_COLUMNS = dict(
+    [(field, ('balance_sheet_tags', field)) for field in BALANCE_SHEET_FIELDS]
+    + [(field, ('income_statement_tags', field)) for field in INCOME_STATEMENT_FIELDS]
+    + [(column, ('cashflow_tags', field)) for field, column in CASH_FLOW_FIELDS.items()]
+)
+
+PANEL_COLUMNS = tuple(_SINGLE_YEAR_COLUMNS) + tuple(
+    f'{field}_{suffix}' for field in MULTI_YEAR_FIELDS for suffix in ('current', 'last')
+) + ('capital_expenditure',)
+
+
+def _unit_facts(concept: dict, unit: str = 'USD') -> list:
+    """
+    Same unit selection as the parser: exact unit, then any USD-like unit
+    """
+    units = concept.get('units', {})
+    if unit in units:
+        return units[unit]
+    for u in units:
+        if 'usd' in u.lower():
+            return units[u]
+    return []
+
+
+def _filing_dates(us_gaap: dict, revenue_tags: list) -> dict:
+    """
+    fiscal year -> date its original 10-K was filed (the point-in-time as-of date)
+    Taken from the first revenue tag that has 10-K data, as the parser does
+    """
+    for tag in revenue_tags:
+        if tag not in us_gaap:
+            continue
+        as_of = {}
+        for f in _unit_facts(us_gaap[tag]):
+            if f.get('form') not in TEN_K_FORMS or f.get('fy') is None or not f.get('filed'):
+                continue
+            fy = int(f['fy'])
+            if fy not in as_of or f['filed'] < as_of[fy]:
+                as_of[fy] = f['filed']
+        if as_of:
+            return as_of
+    return {}
+
+
+def _values_by_year(concept: dict, as_of: dict) -> dict:
+    """
+    One pass over a concept: fiscal year -> latest-period value known at that
+    year's as-of date (later amendments and restatements are ignored)
+    """
+    best = {}
+    for f in _unit_facts(concept):
+        if f.get('form') not in TEN_K_FORMS or f.get('fy') is None:
+            continue
+        fy = int(f['fy'])
+        filed = f.get('filed') or ''
+        if fy not in as_of or filed > as_of[fy] or f.get('val') is None:
+            continue
+        key = (f.get('end') or '', filed)
+        if fy not in best or key > best[fy][0]:
+            best[fy] = (key, f['val'])
+    return {fy: value for fy, (_, value) in best.items()}
+
+
+def company_rows(company_facts: dict, alt_tags: dict) -> list:
+    """
+    Point-in-time facts for every fiscal year of one company, using only facts
+    filed on or before that year's 10-K filing date
+    """
+    us_gaap = company_facts.get('facts', {}).get('us-gaap', {})
+    revenue_tags = alt_tags.get('income_statement_tags', {}).get('revenue', ['Revenues'])
+    as_of = _filing_dates(us_gaap, revenue_tags)
+    if not as_of:
+        return []
+
+    series_cache = {}
+
+    def series(tag):
+        if tag not in series_cache:
+            series_cache[tag] = _values_by_year(us_gaap[tag], as_of) if tag in us_gaap else {}
+        return series_cache[tag]
+
+    def first_available(category, field, fy):
+        for tag in alt_tags.get(category, {}).get(field, []):
+            value = series(tag).get(fy)
+            if value is not None:
+                return value
+        return None
+
+    years = sorted(as_of)
+    cik = str(company_facts.get('cik', '')).zfill(10)
+    rows = []
+
+    for position, fy in enumerate(years):
+        row = {'cik': cik, 'fy': fy, 'as_of': as_of[fy]}
+        for column, (category, field) in _SINGLE_YEAR_COLUMNS.items():
+            row[column] = first_available(category, field, fy)
+
+        if row['total_liabilities'] is None and row['current_liabilities']:
+            for tag in NONCURRENT_LIABILITY_TAGS:
+                noncurrent = series(tag).get(fy)
+                if noncurrent:
+                    row['total_liabilities'] = row['current_liabilities'] + noncurrent
+                    break
+
+        prior_fy = years[position - 1] if position > 0 else None
+        for field in MULTI_YEAR_FIELDS:
+            # Both years come from the first tag with a current value, as in the parser
+            row[f'{field}_current'] = row[f'{field}_last'] = None
+            for tag in alt_tags.get('income_statement_tags', {}).get(field, []):
+                value = series(tag).get(fy)
+                if value is not None:
+                    row[f'{field}_current'] = value
+                    row[f'{field}_last'] = series(tag).get(prior_fy) if prior_fy is not None else None
+                    break
+
+        # Matches build_facts, where capital_expenditure is never parsed and defaults to 0
+        row['capital_expenditure'] = 0
+        if row['inventory'] is None:
+            row['inventory'] = 0
+
+        rows.append(row)
+
+    return rows
+
+
+def build_panel(company_facts_iter, alt_tags: dict = None) -> dict:
+    """
+    Columnar company-year panel from an iterable of companyfacts payloads
+
+    Returns dict of equal-length numpy arrays: cik, fy, as_of (datetime64[D])
+    and one float column per field (NaN where missing)
+    """
+    if alt_tags is None:
+        alt_tags = Parser().alt_tags
+
+    columns = {name: [] for name in ('cik', 'fy', 'as_of') + PANEL_COLUMNS}
+    for company_facts in company_facts_iter:
+        for row in company_rows(company_facts, alt_tags):
+            for name, values in columns.items():
+                values.append(row.get(name))
+
+    panel = {
+        'cik': np.array(columns['cik'], dtype='U10'),
+        'fy': np.array(columns['fy'], dtype=np.int64),
+        'as_of': np.array(columns['as_of'], dtype='datetime64[D]'),
+    }
+    for name in PANEL_COLUMNS:
+        panel[name] = np.array([np.nan if v is None else v for v in columns[name]], dtype=float)
+    return panel
+
+
+def iter_archive(archive) -> iter:
+    """
+    Companyfacts payloads recorded in a ResponseArchive (SECClient record mode)
+    """
+    for url in archive.urls():
+        if '/api/xbrl/companyfacts/' in url:
+            yield json.loads(archive.get(url))
+
+
+def iter_directory(path: str) -> iter:
+    """
+    Companyfacts payloads stored as *.json or *.json.gz files in a directory
+    (e.g. the SEC's bulk companyfacts.zip, extracted)
+    """
+    for file_path in sorted(glob.glob(os.path.join(path, '*.json')) + glob.glob(os.path.join(path, '*.json.gz'))):
+        opener = gzip.open if file_path.endswith('.gz') else open
+        try:
+            with opener(file_path, 'rb') as f:
+                yield json.load(f)
+        except ValueError as e:
+            print(f"Warning: Skipping unreadable companyfacts file {file_path}: {e}")
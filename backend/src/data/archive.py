@@ -0,0 +1,129 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+class ArchiveMissError(LookupError):
+    """Replay mode was asked for a URL that was never recorded"""
+
+
+class ResponseArchive:
+    """
+    Content-addressed store of raw SEC responses
+
+    Layout:
+        objects/ab/abcdef....gz  - gzip-compressed body, named by sha256 of the body
+        index.jsonl              - append-only {url, sha256, size, fetched_at} lines
+
+    Identical bodies (e.g. unchanged submissions across runs) are stored once,
+    and the last index line for a URL wins so re-recording updates it.
+    404 responses are indexed as {url, status: 404, fetched_at} without a body.
+    """
+    def __init__(self, root: str):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.index_path = os.path.join(root, 'index.jsonl')
+        self._lock = threading.Lock()
+        self._not_found = set()
+        self._index = self._load_index()
+
+    def _load_index(self) -> dict:
+        """
+        Read the URL -> sha256 index, tolerating a truncated last line
+        URLs whose latest entry is a 404 go to self._not_found instead
+        """
+        index = {}
+        try:
+            with open(self.index_path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    url = entry['url']
+                    if entry.get('status') == 404:
+                        index.pop(url, None)
+                        self._not_found.add(url)
+                    else:
+                        index[url] = entry['sha256']
+                        self._not_found.discard(url)
+        except FileNotFoundError:
+            pass
+        return index
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.gz")
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def urls(self) -> list:
+        return list(self._index.keys())
+
+    def put(self, url: str, content: bytes) -> str:
+        """
+        Store a response body and point url at it, returns the content hash
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest)
+
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Write then rename so a crash never leaves a partial object
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with gzip.open(tmp_path, 'wb') as f:
+                    f.write(content)
+                os.replace(tmp_path, path)
+
+            if self._index.get(url) != digest:
+                self._append_index({
+                    'url': url,
+                    'sha256': digest,
+                    'size': len(content),
+                    'fetched_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                })
+                self._index[url] = digest
+                self._not_found.discard(url)
+
+        return digest
+
+    def put_not_found(self, url: str):
+        """
+        Record that url answered 404, so replay can answer the same way
+        """
+        with self._lock:
+            if url in self._not_found:
+                return
+            self._append_index({
+                'url': url,
+                'status': 404,
+                'fetched_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            })
+            self._index.pop(url, None)
+            self._not_found.add(url)
+
+    def is_not_found(self, url: str) -> bool:
+        return url in self._not_found
+
+    def _append_index(self, entry: dict):
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.index_path, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+
+    def get(self, url: str) -> bytes:
+        """
+        Return the recorded body for url, raises ArchiveMissError if absent
+        """
+        digest = self._index.get(url)
+        if digest is None:
+            raise ArchiveMissError(f"No recorded response for {url}")
+
+        with gzip.open(self._object_path(digest), 'rb') as f:
+            return f.read()
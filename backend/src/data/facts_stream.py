@@ -0,0 +1,195 @@
+import codecs
+import json
+import time
+
+# Nesting depth of concept objects: top level -> "facts" -> taxonomy -> concept
+_CONCEPT_DEPTH = 2
+
+_WHITESPACE = ' \t\n\r'
+
+
+class CompanyFactsDecoder:
+    """
+    Incremental companyfacts JSON decoder, fed download chunks as they arrive
+
+    A small state machine walks the outer objects (top level, "facts" and each
+    taxonomy) and decodes every concept with json.JSONDecoder.raw_decode as soon
+    as its closing brace has arrived, so decoding overlaps the download instead
+    of starting after it. With concepts given, only those concepts are kept;
+    the rest are decoded and dropped right away rather than held until parse.
+    With on_concept given, each kept concept is stored as
+    on_concept(taxonomy, name, concept) instead, so per-concept parse work also runs while the body downloads.
+
+    The result has the same shape as json.loads of the full body.
+    """
+    def __init__(self, concepts=None, on_concept=None):
+        self.concepts = set(concepts) if concepts is not None else None
+        self.on_concept = on_concept
+        self.result = None
+        self.bytes_fed = 0
+        # Time spent decoding across every feed() and finish()
+        self.decode_seconds = 0.0
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._pending = []
+        self._pending_len = 0
+        # Unconsumed characters needed before retrying an incomplete value;
+        # doubled on each miss so a large value is not re-decoded every chunk
+        self._need = 0
+        # Open objects being filled, outermost first
+        self._stack = []
+        self._state = 'start'
+        self._key = None
+        self._taxonomy = None
+        self._done = False
+
+    def feed(self, chunk: bytes):
+        """
+        Decode whatever complete values the new bytes finish
+        """
+        self.bytes_fed += len(chunk)
+        text = self._utf8.decode(chunk)
+        if not text:
+            return
+        self._pending.append(text)
+        self._pending_len += len(text)
+        if len(self._buffer) - self._pos + self._pending_len >= self._need:
+            start = time.perf_counter()
+            self._advance(final=False)
+            self.decode_seconds += time.perf_counter() - start
+
+    def finish(self) -> dict:
+        """
+        Decode the rest of the body and return the document
+        Raises ValueError if the body is truncated or not companyfacts JSON
+        """
+        start = time.perf_counter()
+        tail = self._utf8.decode(b'', final=True)
+        if tail:
+            self._pending.append(tail)
+            self._pending_len += len(tail)
+        self._advance(final=True)
+        self.decode_seconds += time.perf_counter() - start
+        if not self._done:
+            raise ValueError("Incomplete companyfacts JSON")
+        return self.result
+
+    def _advance(self, final: bool):
+        buffer = self._buffer[self._pos:]
+        if self._pending:
+            buffer += ''.join(self._pending)
+            self._pending = []
+            self._pending_len = 0
+        self._buffer = buffer
+        self._pos = 0
+
+        while not self._done:
+            pos = self._skip_whitespace()
+            if pos == len(self._buffer):
+                break
+            if not self._step(pos, final):
+                # Wait until the unconsumed text has at least doubled
+                self._need = 2 * (len(self._buffer) - self._pos)
+                return
+        self._need = 0
+
+    def _skip_whitespace(self) -> int:
+        buffer, pos = self._buffer, self._pos
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        self._pos = pos
+        return pos
+
+    def _decode_value(self, pos: int, final: bool):
+        """
+        (value, end) for the JSON value at pos, or None if it has not fully arrived
+        """
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return None
+        # A number at the end of the buffer may continue in the next chunk
+        if end == len(self._buffer) and not final:
+            return None
+        return value, end
+
+    def _step(self, pos: int, final: bool) -> bool:
+        """
+        Consume one token or value; False if more input is needed
+        """
+        char = self._buffer[pos]
+        state = self._state
+
+        if state == 'start':
+            if char != '{':
+                raise ValueError("companyfacts JSON must be an object")
+            self.result = {}
+            self._stack.append(self.result)
+            self._pos = pos + 1
+            self._state = 'first_key'
+            return True
+
+        if state in ('first_key', 'key', 'next'):
+            if char == '}' and state != 'key':
+                self._close_object()
+                self._pos = pos + 1
+                return True
+            if state == 'next':
+                if char != ',':
+                    raise ValueError(f"Unexpected {char!r} in companyfacts JSON")
+                self._pos = pos + 1
+                self._state = 'key'
+                return True
+            decoded = self._decode_value(pos, final)
+            if decoded is None:
+                return False
+            self._key, self._pos = decoded
+            if not isinstance(self._key, str):
+                raise ValueError("Object keys in companyfacts JSON must be strings")
+            self._state = 'colon'
+            return True
+
+        if state == 'colon':
+            if char != ':':
+                raise ValueError(f"Unexpected {char!r} in companyfacts JSON")
+            self._pos = pos + 1
+            self._state = 'value'
+            return True
+
+        # state == 'value'
+        depth = len(self._stack) - 1
+        parent = self._stack[-1]
+        if char == '{' and (depth == 1 or (depth == 0 and self._key == 'facts')):
+            # Descend into "facts" or a taxonomy instead of decoding it whole
+            child = {}
+            parent[self._key] = child
+            if depth == 1:
+                self._taxonomy = self._key
+            self._stack.append(child)
+            self._pos = pos + 1
+            self._state = 'first_key'
+            return True
+
+        decoded = self._decode_value(pos, final)
+        if decoded is None:
+            return False
+        value, self._pos = decoded
+        if depth != _CONCEPT_DEPTH:
+            parent[self._key] = value
+        elif self.concepts is None or self._key in self.concepts:
+            if self.on_concept is not None and isinstance(value, dict):
+                value = self.on_concept(self._taxonomy, self._key, value)
+            parent[self._key] = value
+        self._state = 'next'
+        return True
+
+    def _close_object(self):
+        self._stack.pop()
+        if self._stack:
+            self._state = 'next'
+        else:
+            self._done = True
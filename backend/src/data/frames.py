@@ -0,0 +1,142 @@
+from src.data.sec_client import SECClient
+from src.parsers.parser import NONCURRENT_LIABILITY_TAGS, Parser
+
+# Fields calculate_composite reads, by alt_tags.json category
+BALANCE_SHEET_FIELDS = (
+    'total_assets',
+    'current_assets',
+    'inventory',
+    'total_liabilities',
+    'current_liabilities',
+    'stockholders_equity',
+)
+INCOME_STATEMENT_FIELDS = (
+    'cost_of_goods_sold',
+    'operating_income',
+    'operating_expenses',
+    'interest_expense',
+)
+MULTI_YEAR_FIELDS = ('revenue', 'net_income')
+CASH_FLOW_FIELDS = {
+    'operating_cf': 'operating_cash_flow',
+    'depreciation': 'depreciation',
+}
+
+
+class FramesIngestor:
+    """
+    Builds parser-shaped facts for every filer from the XBRL frames API
+
+    One request per concept and period covers all companies, so a full-market
+    refresh takes dozens of requests instead of one companyfacts call per CIK.
+    Frames are calendar-aligned (CY2023 / CY2023Q4I), so for non-December
+    fiscal years the values are the SEC's closest-calendar-period mapping.
+    """
+    def __init__(self, client: SECClient = None, alt_tags: dict = None):
+        self.client = client or SECClient()
+        self.alt_tags = alt_tags if alt_tags is not None else Parser().alt_tags
+        self.entity_names = {}
+        self._frames = {}
+
+    def _frame_values(self, tag: str, period: str, unit: str = 'USD') -> dict:
+        """
+        Fetch one frame and map CIK -> value, memoized per (tag, period, unit)
+        """
+        key = (tag, period, unit)
+        if key in self._frames:
+            return self._frames[key]
+
+        frame = self.client.get_frame(tag, period, unit)
+        values = {}
+        for row in (frame or {}).get('data', []):
+            cik = str(row.get('cik')).zfill(10)
+            if row.get('val') is None:
+                continue
+            values[cik] = row['val']
+            if row.get('entityName'):
+                self.entity_names[cik] = row['entityName']
+
+        self._frames[key] = values
+        return values
+
+    def _fill_field(self, results: dict, category: str, field: str, period: str, section: str, key: str):
+        """
+        Fill results[cik][section][key] from alt tags in config order,
+        first tag with a value for a company wins
+        """
+        for tag in self.alt_tags.get(category, {}).get(field, []):
+            for cik, value in self._frame_values(tag, period).items():
+                statement = results.setdefault(cik, _empty_parsed())[section]
+                if key not in statement:
+                    statement[key] = value
+
+    def _fill_multi_year(self, results: dict, field: str, current: str, prior: str):
+        """
+        Fill {field}_current and {field}_last for each company from one tag,
+        the first in config order with a current-year value, as the parser does
+        """
+        for tag in self.alt_tags.get('income_statement_tags', {}).get(field, []):
+            claimed = []
+            for cik, value in self._frame_values(tag, current).items():
+                income = results.setdefault(cik, _empty_parsed())['income_statement']
+                if f'{field}_current' not in income:
+                    income[f'{field}_current'] = value
+                    claimed.append(cik)
+            if not claimed:
+                continue
+            prior_values = self._frame_values(tag, prior)
+            for cik in claimed:
+                if cik in prior_values:
+                    results[cik]['income_statement'][f'{field}_last'] = prior_values[cik]
+
+    def fetch_year(self, year: int) -> dict:
+        """
+        Returns {cik: parsed} for every filer with data in calendar year `year`,
+        where parsed has the same shape as Parser.parse output
+        """
+        instant = f"CY{year}Q4I"
+        current = f"CY{year}"
+        prior = f"CY{year - 1}"
+        results = {}
+
+        for field in BALANCE_SHEET_FIELDS:
+            self._fill_field(results, 'balance_sheet_tags', field, instant, 'balance_sheet', field)
+
+        for field in INCOME_STATEMENT_FIELDS:
+            self._fill_field(results, 'income_statement_tags', field, current, 'income_statement', field)
+
+        for field in MULTI_YEAR_FIELDS:
+            self._fill_multi_year(results, field, current, prior)
+
+        for field, key in CASH_FLOW_FIELDS.items():
+            self._fill_field(results, 'cashflow_tags', field, current, 'cash_flow', key)
+
+        for cik, parsed in results.items():
+            income = parsed['income_statement']
+            for field in MULTI_YEAR_FIELDS:
+                if f'{field}_current' in income:
+                    income[field] = income[f'{field}_current']
+
+            balance = parsed['balance_sheet']
+            if 'total_liabilities' not in balance and balance.get('current_liabilities'):
+                for tag in NONCURRENT_LIABILITY_TAGS:
+                    noncurrent = self._frame_values(tag, instant).get(cik)
+                    if noncurrent:
+                        balance['total_liabilities'] = balance['current_liabilities'] + noncurrent
+                        break
+
+            parsed['fiscal_years'] = {
+                'current_year': year,
+                'prior_year': year - 1 if 'revenue_last' in income or 'net_income_last' in income else None,
+            }
+
+        return results
+
+
+def _empty_parsed() -> dict:
+    return {
+        'balance_sheet': {},
+        'income_statement': {},
+        'cash_flow': {},
+        'fiscal_years': {'current_year': None, 'prior_year': None},
+    }
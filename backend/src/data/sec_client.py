@@ -1,12 +1,173 @@
-import requests
+import json
 import os
+import threading
+import time
+
+import requests
+
+from src.data.archive import ArchiveMissError, ResponseArchive
+from src.data.facts_stream import CompanyFactsDecoder
+from src.monitoring.metrics import (
+    CACHE_REQUESTS,
+    SEC_RATE_LIMIT_WAIT_SECONDS,
+    SEC_RESPONSE_BYTES,
+    SEC_RESPONSES,
+    record_stage,
+    stage,
+)
+from src.pipeline.admission import estimate_json_bytes, known_size, record_size, reserve_payload
+from src.pipeline.deadline import DeadlineExceeded, RequestCancelled, current_deadline
+
+# SEC fair-access policy allows at most 10 requests per second per client
+SEC_MAX_REQUESTS_PER_SECOND = float(os.getenv('SEC_MAX_RPS', '10'))
+
+# company_tickers.json changes rarely, so it is shared across clients for a day
+CIK_MAP_TTL_SECONDS = 24 * 60 * 60
+
+# live: network only, record: network + archive every response, replay: archive only
+CLIENT_MODES = ('live', 'record', 'replay')
+
+# Overridable so the client can be pointed at a local fixture server or mirror
+SEC_WWW_URL = os.getenv('SEC_WWW_URL', 'https://www.sec.gov').rstrip('/')
+SEC_DATA_URL = os.getenv('SEC_DATA_URL', 'https://data.sec.gov').rstrip('/')
+
+# Downloads are read in chunks so a deadline or cancellation can stop them midway
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+# Socket timeout for SEC requests (capped by the request deadline, if any)
+REQUEST_TIMEOUT_SECONDS = 10
+
+DEFAULT_ARCHIVE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'sec_archive')
+
+
+class _RateLimiter:
+    """
+    Process-wide request spacing shared by every SECClient
+    """
+    def __init__(self, max_per_second: float):
+        self.interval = 1.0 / max_per_second if max_per_second > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> float:
+        """
+        Block until the next request slot, returns seconds waited
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+_rate_limiter = _RateLimiter(SEC_MAX_REQUESTS_PER_SECOND)
+
+_cik_map_cache = {'mapping': None, 'companies': [], 'loaded_at': 0.0}
+_cik_map_lock = threading.Lock()
+
+# (mode, archive root) -> CIK map cache for record and replay clients,
+# kept apart from the live map so replays never mix in live data
+_archive_cik_maps = {}
+
+# Archive root -> ResponseArchive, so each index is loaded once per process
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+def _shared_archive(root: str) -> ResponseArchive:
+    root = os.path.abspath(root)
+    with _archives_lock:
+        archive = _archives.get(root)
+        if archive is None:
+            archive = _archives[root] = ResponseArchive(root)
+        return archive
+
+
+def seed_cik_map(mapping, companies, age_seconds: float = 0.0):
+    """
+    Prime the shared CIK map (e.g. from a snapshot) unless one is already loaded
+    age_seconds counts against the TTL, so a day-old map is refreshed on schedule
+    """
+    with _cik_map_lock:
+        if _cik_map_cache['mapping']:
+            return
+        _cik_map_cache['mapping'] = mapping
+        _cik_map_cache['companies'] = companies
+        _cik_map_cache['loaded_at'] = time.monotonic() - max(age_seconds, 0.0)
+
+
+def cached_companies():
+    """
+    Companies list of the shared CIK map, empty if none is loaded
+    """
+    with _cik_map_lock:
+        return _cik_map_cache['companies']
+
+
+def _cik_map_cache_for(mode: str, archive_root: str = None) -> dict:
+    """
+    The shared CIK map cache entry for a client mode (call with _cik_map_lock held)
+    """
+    if mode == 'live':
+        return _cik_map_cache
+    key = (mode, archive_root)
+    return _archive_cik_maps.setdefault(key, {'mapping': None, 'companies': [], 'loaded_at': 0.0})
+
+
+def _cik_map_fresh(cache: dict) -> bool:
+    return bool(cache['mapping']) and time.monotonic() - cache['loaded_at'] < CIK_MAP_TTL_SECONDS
+
+
+def shared_companies(mode: str = None, archive_dir: str = None) -> list:
+    """
+    Companies list of the shared CIK map for a client mode (SEC_CLIENT_MODE by default)
+    Only builds a client when the map is missing or expired, so the list
+    object stays the same until the map is actually reloaded
+    """
+    mode = mode or os.getenv('SEC_CLIENT_MODE', 'live')
+    archive_root = None
+    if mode != 'live':
+        archive_root = os.path.abspath(archive_dir or os.getenv('SEC_ARCHIVE_DIR', DEFAULT_ARCHIVE_DIR))
+    with _cik_map_lock:
+        cache = _cik_map_cache_for(mode, archive_root)
+        if _cik_map_fresh(cache):
+            CACHE_REQUESTS.inc(cache='cik_map', result='hit')
+            return cache['companies']
+    return SECClient(mode=mode, archive_dir=archive_dir).companies
+
+
+def _recorded_not_found(url: str) -> requests.HTTPError:
+    """
+    The HTTPError a live 404 would raise, for a 404 replayed from the archive
+    """
+    response = requests.Response()
+    response.status_code = 404
+    response.url = url
+    return requests.HTTPError(f"404 Client Error: Not Found (recorded) for url: {url}", response=response)
+
 
 class SECClient:
-    def __init__(self, user_agent: str = None):
+    def __init__(self, user_agent: str = None, mode: str = None, archive_dir: str = None):
         """
         Use provided user agent or fall back to environment variable
         Users should set SEC_USER_AGENT env var with their contact info
+
+        mode (or SEC_CLIENT_MODE) selects live, record or replay; record and
+        replay use the response archive at archive_dir (or SEC_ARCHIVE_DIR)
         """
+        if mode is None:
+            mode = os.getenv('SEC_CLIENT_MODE', 'live')
+        if mode not in CLIENT_MODES:
+            raise ValueError(f"Unknown SEC client mode {mode}, expected one of {CLIENT_MODES}")
+        self.mode = mode
+
+        self.archive = None
+        if mode != 'live':
+            self.archive = _shared_archive(archive_dir or os.getenv('SEC_ARCHIVE_DIR', DEFAULT_ARCHIVE_DIR))
+
         if user_agent is None:
             user_agent = os.getenv(
                 'SEC_USER_AGENT',
@@ -19,22 +180,124 @@ class SECClient:
             'Accept-Encoding': 'gzip, deflate'
         }
 
-        self.cik_map = self._load_cik_map()
+        self.cik_map, self.companies = self._load_cik_map()
+
+        # Submissions are small and used for both filing info and company info
+        self._submissions = {}
+
+    def _get(self, url: str, endpoint: str, size_key: str = None, sink=None) -> bytes:
+        """
+        Rate-limited GET that records status codes and response sizes
+        In replay mode the body comes from the archive and the network is never touched
+
+        The current request deadline (if any) caps the socket timeout and is
+        checked before the request and between downloaded chunks
+
+        With size_key, the payload's memory is reserved in the current memory
+        job before the body is read: from the size last seen for that key, or
+        else from the response's Content-Length
+
+        With sink, each chunk is passed to sink.feed() as it arrives so decoding
+        overlaps the download; the body is then only kept (and returned) when
+        it has to be archived, otherwise None is returned
+        """
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.check(endpoint)
+
+        if self.mode == 'replay':
+            if self.archive.is_not_found(url):
+                SEC_RESPONSES.inc(endpoint=endpoint, status='replay')
+                raise _recorded_not_found(url)
+            content = self.archive.get(url)
+            if size_key is not None:
+                reserve_payload(len(content), deadline)
+            SEC_RESPONSES.inc(endpoint=endpoint, status='replay')
+            if sink is not None:
+                sink.feed(content)
+            return content
+
+        known = known_size(size_key) if size_key is not None else None
+        if known is not None:
+            reserve_payload(known, deadline)
+
+        SEC_RATE_LIMIT_WAIT_SECONDS.observe(_rate_limiter.wait())
+
+        timeout = REQUEST_TIMEOUT_SECONDS
+        if deadline is not None:
+            deadline.check(endpoint)
+            timeout = deadline.timeout(REQUEST_TIMEOUT_SECONDS)
+
+        with requests.get(url, headers=self.headers, timeout=timeout, stream=True) as response:
+            SEC_RESPONSES.inc(endpoint=endpoint, status=response.status_code)
+            if response.status_code == 404 and self.mode == 'record':
+                # Missing frames are normal, so replay must see the same 404
+                self.archive.put_not_found(url)
+            response.raise_for_status()
+
+            if size_key is not None and known is None:
+                headers = response.headers
+                reserve_payload(estimate_json_bytes(headers.get('Content-Length'), headers.get('Content-Encoding')), deadline)
+
+            # iter_content yields decompressed bytes, so gzip is undone chunk by chunk too
+            keep = sink is None or self.mode == 'record'
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if keep:
+                    chunks.append(chunk)
+                if sink is not None:
+                    sink.feed(chunk)
+                if deadline is not None:
+                    deadline.check(endpoint)
+            content = b''.join(chunks) if keep else None
+
+        SEC_RESPONSE_BYTES.observe(size, endpoint=endpoint)
+        if size_key is not None:
+            record_size(size_key, size)
+
+        if self.mode == 'record':
+            self.archive.put(url, content)
+        return content
 
     def _load_cik_map(self):
         """
-        Loads all CIK's
+        Loads all CIK's, shared between clients until the cache expires
+        Record and replay clients share a separate map per archive root
+        Returns (ticker -> CIK mapping, list of (ticker, cik, title))
         """
-        url = "https://www.sec.gov/files/company_tickers.json"
+        with _cik_map_lock:
+            cache = _cik_map_cache_for(self.mode, self.archive.root if self.archive else None)
+            if _cik_map_fresh(cache):
+                CACHE_REQUESTS.inc(cache='cik_map', result='hit')
+                return cache['mapping'], cache['companies']
+            CACHE_REQUESTS.inc(cache='cik_map', result='miss')
+
+            mapping, companies = self._download_cik_map()
+            if mapping:
+                cache['mapping'] = mapping
+                cache['companies'] = companies
+                cache['loaded_at'] = time.monotonic()
+            return mapping, companies
+
+    def _download_cik_map(self):
+        """
+        Downloads company_tickers.json and maps ticker -> CIK
+        """
+        url = f"{SEC_WWW_URL}/files/company_tickers.json"
 
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            with stage('cik_map'):
+                data = json.loads(self._get(url, 'company_tickers'))
+        except (DeadlineExceeded, RequestCancelled, ArchiveMissError):
+            # An unrecorded map is a broken archive, not an empty ticker list
+            raise
         except Exception:
-            return {}
+            return {}, []
 
         mapping = {}
+        companies = []
 
         for company in data.values():
             ticker = company.get('ticker')
@@ -45,8 +308,9 @@ class SECClient:
             # SEC CIKs are 10 digits
             cik = str(cik_str).zfill(10)
             mapping[ticker.upper()] = cik
+            companies.append((ticker.upper(), cik, company.get('title') or ''))
 
-        return mapping
+        return mapping, companies
 
     def get_cik(self, ticker: str) -> str:
         """
@@ -59,31 +323,76 @@ class SECClient:
 
         return self.cik_map[ticker]
 
-    def get_latest_10k(self, ticker: str) -> dict:
+    def get_latest_10k(self, ticker: str, concepts=None, on_concept=None) -> dict:
         """
         Get the latest 10-K data from SEC Company Facts API
         Note: Some companies have outdated company facts
+
+        The body is decoded while it downloads; with concepts, only those
+        concepts are kept (e.g. Parser().concepts()), and on_concept(taxonomy, name,
+        concept) (e.g. Parser().prepare_concept) reduces each one as it arrives
         """
         cik = self.get_cik(ticker)
-        url = f"https://data.sec.gov/api/xbrl/companyfacts/CIK{cik}.json"
+        url = f"{SEC_DATA_URL}/api/xbrl/companyfacts/CIK{cik}.json"
 
-        response = requests.get(url, headers=self.headers, timeout=10)
-        response.raise_for_status()
+        decoder = CompanyFactsDecoder(concepts, on_concept=on_concept)
+        with stage('companyfacts_fetch'):
+            self._get(url, 'companyfacts', size_key=cik, sink=decoder)
+            data = decoder.finish()
 
-        return response.json()
+        # Decoding is interleaved with the download, so it is timed inside the decoder
+        record_stage('decode', decoder.decode_seconds)
+        return data
     
+    def get_frame(self, tag: str, period: str, unit: str = 'USD', taxonomy: str = 'us-gaap') -> dict:
+        """
+        Get one concept for every filer in a period from the XBRL frames API
+        period is CY2023 for annual durations or CY2023Q4I for instants
+        Returns None when no frame exists for the tag/unit/period
+        """
+        url = f"{SEC_DATA_URL}/api/xbrl/frames/{taxonomy}/{tag}/{unit}/{period}.json"
+
+        try:
+            with stage('frames_fetch'):
+                content = self._get(url, 'frames')
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return None
+            raise
+
+        with stage('decode'):
+            return json.loads(content)
+
     def _get_recent_filings(self, ticker: str) -> dict:
         """
         Get recent filings from submissions endpoint
         Returns the submissions data which includes recent 10-K filings
+        Cached per client so one analysis fetches it once
         """
         cik = self.get_cik(ticker)
-        url = f"https://data.sec.gov/submissions/CIK{cik}.json"
+        if cik in self._submissions:
+            return self._submissions[cik]
+
+        url = f"{SEC_DATA_URL}/submissions/CIK{cik}.json"
 
-        response = requests.get(url, headers=self.headers, timeout=10)
-        response.raise_for_status()
+        with stage('submissions'):
+            submissions = json.loads(self._get(url, 'submissions'))
 
-        return response.json()
+        self._submissions[cik] = submissions
+        return submissions
+
+    def get_company_info(self, ticker: str) -> dict:
+        """
+        Get company name and SIC industry classification from submissions
+        Returns dict with name, sic, sic_description (sic is None if unclassified)
+        """
+        submissions = self._get_recent_filings(ticker)
+
+        return {
+            'name': submissions.get('name'),
+            'sic': submissions.get('sic') or None,
+            'sic_description': submissions.get('sicDescription') or None,
+        }
     
     def get_latest_10k_filing_info(self, ticker: str) -> dict:
         """
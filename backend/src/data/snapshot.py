@@ -0,0 +1,352 @@
+"""
+Immutable, versioned snapshots of the scored universe
+
+A snapshot file holds the CIK index, the company list and the latest stored
+result (with parsed facts) for every scored company. It is written once to a
+temporary file and renamed into place, then only ever read through mmap:
+lookups binary-search a fixed-width key table in the mapped file and decode
+just the one record they need, so opening a snapshot costs the same for ten
+companies or ten thousand.
+
+Layout (little-endian):
+    header   magic, format version, created_at, section count
+    sections name, offset, length (one entry per section)
+    table    count, key width, sorted keys, (offset, length) per key, JSON values
+    blob     a single JSON value
+"""
+import asyncio
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+from src.data import sec_client
+from src.scoring.score_store import REQUEST_ONLY_FIELDS
+
+MAGIC = b'DSNAP\x00\x00\x01'
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct('<8sIdI')
+_SECTION = struct.Struct('<8sQQ')
+_TABLE_HEADER = struct.Struct('<II')
+_ENTRY = struct.Struct('<QI')
+
+SNAPSHOT_DIR = os.getenv(
+    'SNAPSHOT_DIR',
+    os.path.join(os.path.dirname(__file__), '..', '..', 'snapshots'),
+)
+
+# Snapshots older than the newest few are deleted after each write
+SNAPSHOT_KEEP = int(os.getenv('SNAPSHOT_KEEP', '3'))
+
+# Seconds between snapshot writes (only when scores changed); 0 disables writing
+SNAPSHOT_INTERVAL = float(os.getenv('SNAPSHOT_INTERVAL', '900'))
+
+FILE_PATTERN = 'snapshot-*.bin'
+
+
+class SnapshotFormatError(ValueError):
+    """File is not a snapshot this version can read"""
+
+
+def _encode(value) -> bytes:
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+def _table_section(records: dict) -> bytes:
+    """
+    Sorted fixed-width keys followed by their JSON values
+    """
+    keys = sorted(key.encode('utf-8') for key in records)
+    width = max((len(key) for key in keys), default=1)
+
+    values = []
+    entries = []
+    offset = 0
+    for key in keys:
+        value = _encode(records[key.decode('utf-8')])
+        entries.append(_ENTRY.pack(offset, len(value)))
+        values.append(value)
+        offset += len(value)
+
+    return b''.join(
+        [_TABLE_HEADER.pack(len(keys), width)]
+        + [key.ljust(width, b'\x00') for key in keys]
+        + entries
+        + values
+    )
+
+
+def write_snapshot(directory: str, companies: list, results: list, peers: list,
+                   keep: int = SNAPSHOT_KEEP) -> str:
+    """
+    Write a new snapshot atomically and prune old ones
+
+    companies is the SEC list of (ticker, cik, title), results the stored
+    analysis results and peers [cik, sic, peer values] for each of them
+    Returns the path of the new snapshot
+    """
+    os.makedirs(directory, exist_ok=True)
+    created_at = time.time()
+
+    results_by_cik = {result['cik']: result for result in results}
+    sections = [
+        (b'tickers', _table_section({ticker: cik for ticker, cik, _ in companies})),
+        (b'company', _encode([list(company) for company in companies])),
+        (b'results', _table_section(results_by_cik)),
+        (b'peers', _encode(peers)),
+    ]
+
+    offset = _HEADER.size + _SECTION.size * len(sections)
+    directory_entries = []
+    for name, body in sections:
+        directory_entries.append(_SECTION.pack(name, offset, len(body)))
+        offset += len(body)
+
+    # Millisecond timestamps keep versions ordered by name
+    version = int(created_at * 1000)
+    path = os.path.join(directory, f'snapshot-{version:016d}.bin')
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, created_at, len(sections)))
+        f.writelines(directory_entries)
+        for _, body in sections:
+            f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+    _prune(directory, keep)
+    return path
+
+
+def _prune(directory: str, keep: int):
+    paths = sorted(glob.glob(os.path.join(directory, FILE_PATTERN)))
+    for path in paths[:-max(keep, 1)]:
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"Warning: Could not remove old snapshot {path}: {e}")
+
+
+class SnapshotTable:
+    """
+    Read-only mapping over a table section of a mapped snapshot
+    """
+    def __init__(self, buffer, offset: int):
+        self._buffer = buffer
+        self._count, self._width = _TABLE_HEADER.unpack_from(buffer, offset)
+        self._keys_at = offset + _TABLE_HEADER.size
+        self._entries_at = self._keys_at + self._count * self._width
+        self._values_at = self._entries_at + self._count * _ENTRY.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    def _key(self, i: int) -> bytes:
+        start = self._keys_at + i * self._width
+        return self._buffer[start:start + self._width].rstrip(b'\x00')
+
+    def _find(self, key: str) -> int:
+        target = key.encode('utf-8')
+        if len(target) > self._width:
+            return -1
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < self._count and self._key(low) == target else -1
+
+    def _value(self, i: int):
+        offset, length = _ENTRY.unpack_from(self._buffer, self._entries_at + i * _ENTRY.size)
+        start = self._values_at + offset
+        return json.loads(self._buffer[start:start + length])
+
+    def __contains__(self, key) -> bool:
+        return isinstance(key, str) and self._find(key) >= 0
+
+    def __getitem__(self, key: str):
+        i = self._find(key)
+        if i < 0:
+            raise KeyError(key)
+        return self._value(i)
+
+    def get(self, key: str, default=None):
+        i = self._find(key)
+        return default if i < 0 else self._value(i)
+
+    def keys(self):
+        for i in range(self._count):
+            yield self._key(i).decode('utf-8')
+
+    def items(self):
+        for i in range(self._count):
+            yield self._key(i).decode('utf-8'), self._value(i)
+
+
+class Snapshot:
+    """
+    A memory-mapped snapshot file
+
+    tickers maps ticker -> CIK and results maps CIK -> stored result; both
+    read straight from the mapping. companies() and peer_members() decode
+    their whole section and are meant for one-off index builds.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version, self.created_at, count = _HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise SnapshotFormatError(f"{path} is not a version {FORMAT_VERSION} snapshot")
+
+            self._sections = {}
+            for i in range(count):
+                name, offset, length = _SECTION.unpack_from(self._mmap, _HEADER.size + i * _SECTION.size)
+                if offset + length > len(self._mmap):
+                    raise SnapshotFormatError(f"{path} is truncated")
+                self._sections[name.rstrip(b'\x00').decode('ascii')] = (offset, length)
+
+            self.tickers = SnapshotTable(self._mmap, self._sections['tickers'][0])
+            self.results = SnapshotTable(self._mmap, self._sections['results'][0])
+        except (struct.error, KeyError) as e:
+            self._mmap.close()
+            raise SnapshotFormatError(f"{path} is not a readable snapshot: {e}")
+        except SnapshotFormatError:
+            self._mmap.close()
+            raise
+
+    @property
+    def version(self) -> str:
+        return os.path.basename(self.path)[len('snapshot-'):-len('.bin')]
+
+    def _blob(self, name: str):
+        offset, length = self._sections[name]
+        return json.loads(self._mmap[offset:offset + length])
+
+    def companies(self) -> list:
+        """
+        (ticker, cik, title) in the SEC's original order
+        """
+        return [tuple(company) for company in self._blob('company')]
+
+    def lazy_companies(self):
+        """
+        companies() decoded on first use (typeahead, next snapshot write)
+        """
+        return _LazyList(self.companies)
+
+    def peer_members(self) -> list:
+        """
+        [cik, sic, peer values] for every stored result
+        """
+        return self._blob('peers')
+
+    def close(self):
+        self._mmap.close()
+
+
+def latest_snapshot(directory: str = SNAPSHOT_DIR) -> Snapshot:
+    """
+    Open the newest readable snapshot in directory, or None
+    """
+    for path in sorted(glob.glob(os.path.join(directory, FILE_PATTERN)), reverse=True):
+        try:
+            return Snapshot(path)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Skipping unreadable snapshot {path}: {e}")
+    return None
+
+
+class _LazyList:
+    """
+    Sequence whose items are produced by load() the first time they are needed
+    """
+    def __init__(self, load):
+        self._load = load
+        self._items = None
+        self._lock = threading.Lock()
+
+    def _get(self) -> list:
+        with self._lock:
+            if self._items is None:
+                self._items = self._load()
+            return self._items
+
+    def __len__(self) -> int:
+        return len(self._get())
+
+    def __iter__(self):
+        return iter(self._get())
+
+    def __getitem__(self, i):
+        return self._get()[i]
+
+
+def restore_snapshot(store, directory: str = SNAPSHOT_DIR) -> Snapshot:
+    """
+    Serve the newest snapshot: seed the shared CIK map and attach it to the score store
+    Returns the snapshot, or None when there is none
+    """
+    start = time.perf_counter()
+    snapshot = latest_snapshot(directory)
+    if snapshot is None:
+        return None
+
+    if snapshot.tickers:
+        sec_client.seed_cik_map(snapshot.tickers, snapshot.lazy_companies(), time.time() - snapshot.created_at)
+    store.attach_snapshot(snapshot)
+
+    print(f"Loaded snapshot {snapshot.version} ({len(snapshot.results)} scores) "
+          f"in {time.perf_counter() - start:.3f}s")
+    return snapshot
+
+
+def save_snapshot(store, directory: str = SNAPSHOT_DIR) -> str:
+    """
+    Write the score store and the shared CIK map to a new snapshot
+    """
+    results = [{key: value for key, value in result.items() if key not in REQUEST_ONLY_FIELDS}
+               for _, result in store.items()]
+    companies = list(sec_client.cached_companies())
+    return write_snapshot(directory, companies, results, store.peer_members(results))
+
+
+async def run_snapshot_writer(store, directory: str = SNAPSHOT_DIR, interval: float = SNAPSHOT_INTERVAL):
+    """
+    Background loop writing a snapshot every interval seconds when scores changed
+    A final snapshot is written on cancellation (shutdown) if anything is unsaved
+    """
+    if interval <= 0:
+        return
+    loop = asyncio.get_running_loop()
+    written = store.revision
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            revision = store.revision
+            if revision == written:
+                continue
+            try:
+                await loop.run_in_executor(None, save_snapshot, store, directory)
+                written = revision
+            except Exception as e:
+                print(f"Warning: Snapshot write failed: {e}")
+    except asyncio.CancelledError:
+        if store.revision != written:
+            try:
+                save_snapshot(store, directory)
+            except Exception as e:
+                print(f"Warning: Final snapshot write failed: {e}")
+        raise
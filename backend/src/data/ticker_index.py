@@ -0,0 +1,171 @@
+import bisect
+import re
+import threading
+
+# Company-name words too common to be useful as search keys
+_STOP_WORDS = {'INC', 'CORP', 'CO', 'LTD', 'LLC', 'PLC', 'THE', 'AND', 'OF', 'LP', 'SA', 'NV', 'AG'}
+
+_WORD_RE = re.compile(r'[A-Z0-9]+')
+
+# Bound the work per keystroke for very short, very common prefixes
+MAX_CANDIDATES = 500
+
+# Fuzzy (single-edit) matching only kicks in for terms at least this long
+MIN_FUZZY_LENGTH = 3
+
+
+def _normalize(text: str) -> str:
+    return (text or '').upper().strip()
+
+
+def _words(title: str) -> list:
+    return [w for w in _WORD_RE.findall(_normalize(title)) if w not in _STOP_WORDS]
+
+
+def _deletes(term: str) -> set:
+    """
+    term plus every single-character deletion (symmetric-delete fuzzy matching)
+    """
+    return {term} | {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _prefix_range(keys: list, prefix: str) -> tuple:
+    """
+    [lo, hi) slice of sorted keys starting with prefix, via two binary searches
+    """
+    lo = bisect.bisect_left(keys, prefix)
+    hi = bisect.bisect_left(keys, prefix + '\uffff')
+    return lo, hi
+
+
+class TickerIndex:
+    """
+    In-memory typeahead index over company_tickers.json
+
+    Sorted parallel arrays give prefix lookups by binary search over tickers and
+    company-name words; a symmetric-delete table adds single-typo matching.
+    Built once per CIK map download and shared by every request.
+    """
+    def __init__(self, companies: list):
+        # companies is a list of (ticker, cik, title)
+        self.companies = list(companies)
+
+        tickers = sorted((ticker, i) for i, (ticker, _, _) in enumerate(self.companies))
+        self._ticker_keys = [t for t, _ in tickers]
+        self._ticker_ids = [i for _, i in tickers]
+
+        words = sorted(
+            (word, position, i)
+            for i, (_, _, title) in enumerate(self.companies)
+            for position, word in enumerate(_words(title))
+        )
+        self._word_keys = [w for w, _, _ in words]
+        self._word_ids = [(position, i) for _, position, i in words]
+
+        self._fuzzy = {}
+        for ticker, i in tickers:
+            if len(ticker) >= MIN_FUZZY_LENGTH:
+                for key in _deletes(ticker):
+                    self._fuzzy.setdefault(key, []).append(i)
+        for word in set(self._word_keys):
+            if len(word) >= MIN_FUZZY_LENGTH:
+                for key in _deletes(word):
+                    self._fuzzy.setdefault(key, []).append(word)
+
+    def __len__(self) -> int:
+        return len(self.companies)
+
+    def _entry(self, i: int, match: str) -> dict:
+        ticker, cik, title = self.companies[i]
+        return {'ticker': ticker, 'cik': cik, 'name': title, 'match': match}
+
+    def _name_matches(self, tokens: list) -> list:
+        """
+        Companies whose name has a word starting with each token,
+        ordered by where the first token matched (earlier words first)
+        """
+        lo, hi = _prefix_range(self._word_keys, tokens[0])
+        candidates = sorted(self._word_ids[lo:min(hi, lo + MAX_CANDIDATES)])
+
+        matches = []
+        seen = set()
+        for _, i in candidates:
+            if i in seen:
+                continue
+            seen.add(i)
+            if len(tokens) > 1:
+                name_words = _words(self.companies[i][2])
+                if not all(any(w.startswith(t) for w in name_words) for t in tokens[1:]):
+                    continue
+            matches.append(i)
+        return matches
+
+    def _fuzzy_matches(self, term: str) -> tuple:
+        """
+        Tickers and name words within one edit of term
+        """
+        ticker_ids, words = [], []
+        for key in _deletes(term):
+            for hit in self._fuzzy.get(key, ()):
+                if isinstance(hit, int):
+                    ticker_ids.append(hit)
+                else:
+                    words.append(hit)
+        return ticker_ids, words
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """
+        Ranked matches for a typeahead query:
+        exact ticker, ticker prefix, company-name word prefix, then single-typo matches
+        """
+        query = _normalize(query)
+        tokens = [w for w in _WORD_RE.findall(query)]
+        if not query or not tokens or limit <= 0:
+            return []
+
+        results = []
+        seen = set()
+
+        def add(i, match):
+            if i not in seen and len(results) < limit:
+                seen.add(i)
+                results.append(self._entry(i, match))
+
+        # Ticker prefix (shorter tickers first, so the exact match leads)
+        compact = query.replace(' ', '')
+        lo, hi = _prefix_range(self._ticker_keys, compact)
+        for i in sorted(self._ticker_ids[lo:min(hi, lo + MAX_CANDIDATES)], key=lambda i: len(self.companies[i][0])):
+            add(i, 'ticker')
+
+        if len(results) < limit:
+            for i in self._name_matches(tokens):
+                add(i, 'name')
+                if len(results) >= limit:
+                    break
+
+        if len(results) < limit and len(compact) >= MIN_FUZZY_LENGTH:
+            ticker_ids, words = self._fuzzy_matches(compact)
+            for i in ticker_ids:
+                add(i, 'fuzzy')
+            for word in words:
+                lo = bisect.bisect_left(self._word_keys, word)
+                hi = bisect.bisect_right(self._word_keys, word)
+                for _, i in self._word_ids[lo:hi]:
+                    add(i, 'fuzzy')
+
+        return results
+
+
+_shared = {'source': None, 'index': None}
+_shared_lock = threading.Lock()
+
+
+def get_ticker_index(companies: list) -> TickerIndex:
+    """
+    Shared index for a companies list, rebuilt only when the CIK map is reloaded
+    """
+    with _shared_lock:
+        if _shared['source'] is not companies:
+            _shared['index'] = TickerIndex(companies)
+            _shared['source'] = companies
+        return _shared['index']
@@ -0,0 +1,212 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Latency buckets in seconds, sized for SEC round trips and parsing
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Size buckets in bytes, from tiny submissions to mega-cap companyfacts
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8)
+
+_REGISTRY = []
+
+# Per-request stage timings, only populated when a request opts in
+_request_timings = ContextVar('request_timings', default=None)
+
+# Optional hooks (e.g. the profiler's allocation tracker) called around each stage
+_stage_hooks = ContextVar('stage_hooks', default=())
+
+
+def _label_key(label_names: tuple, labels: dict) -> tuple:
+    return tuple(str(labels.get(name, '')) for name in label_names)
+
+
+def _format_labels(label_names: tuple, key: tuple, extra: str = '') -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(label_names, key)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        """
+        Increment the counter for the given label values
+        """
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def observe(self, value: float, **labels):
+        """
+        Record one observation; cumulative bucket counts are only built at render time
+        """
+        key = _label_key(self.label_names, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (+1 slot for +Inf), sum, count
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[key] = series
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.label_names, key)} {count}')
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    'analysis_stage_seconds',
+    'Time spent in each analysis stage',
+    ('stage',),
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests_total',
+    'Cache lookups by cache name and result (hit/miss)',
+    ('cache', 'result'),
+)
+SEC_RESPONSE_BYTES = Histogram(
+    'sec_response_bytes',
+    'Bytes downloaded per SEC response',
+    ('endpoint',),
+    buckets=BYTES_BUCKETS,
+)
+SEC_RESPONSES = Counter(
+    'sec_responses_total',
+    'SEC responses by endpoint and HTTP status code',
+    ('endpoint', 'status'),
+)
+SEC_RATE_LIMIT_WAIT_SECONDS = Histogram(
+    'sec_rate_limit_wait_seconds',
+    'Time spent waiting on the SEC request rate limiter',
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    'admission_wait_seconds',
+    'Time jobs waited for memory admission before downloading a payload',
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_seconds',
+    'API request latency by route and status code',
+    ('path', 'status'),
+)
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Time a pipeline stage and record it in the stage histogram
+    (and the current request's Server-Timing list, if one is active)
+    """
+    hooks = _stage_hooks.get()
+    for hook in hooks:
+        hook.enter(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+        for hook in hooks:
+            hook.exit(name)
+
+
+def record_stage(name: str, elapsed: float):
+    """
+    Record a stage timed in pieces (e.g. decoding interleaved with a download)
+    Stage hooks are not called
+    """
+    STAGE_SECONDS.observe(elapsed, stage=name)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, elapsed))
+
+
+def start_request_timings() -> list:
+    """
+    Begin collecting stage timings for the current request context
+    """
+    timings = []
+    _request_timings.set(timings)
+    return timings
+
+
+@contextmanager
+def stage_hook(hook):
+    """
+    Install a hook with enter(name)/exit(name) for stages run in this context
+    """
+    token = _stage_hooks.set(_stage_hooks.get() + (hook,))
+    try:
+        yield hook
+    finally:
+        _stage_hooks.reset(token)
+
+
+def format_server_timing(timings: list) -> str:
+    """
+    Format collected stage timings as a Server-Timing header value
+    Repeated stages (e.g. two SEC fetches) are summed
+    """
+    totals = {}
+    for name, elapsed in timings:
+        totals[name] = totals.get(name, 0.0) + elapsed
+    return ', '.join(f'{name};dur={elapsed * 1000:.1f}' for name, elapsed in totals.items())
+
+
+def render_prometheus() -> str:
+    """
+    Render every registered metric in the Prometheus text exposition format
+    """
+    lines = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,137 @@
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+
+from src.monitoring.metrics import stage_hook
+
+# Profiling is disabled unless an admin token is configured
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+# Where .prof files are written (loadable with pstats or snakeviz)
+PROFILE_DIR = os.getenv(
+    'PROFILE_DIR',
+    os.path.join(os.path.dirname(__file__), '..', '..', 'profiles')
+)
+
+# Stages whose peak allocation is reported; companyfacts is decoded while it
+# downloads, so its decode allocations fall in companyfacts_fetch
+TRACKED_STAGES = ('companyfacts_fetch', 'parse')
+
+TOP_FUNCTIONS = 25
+
+# cProfile and tracemalloc are process-global, so only one profiled run at a time
+_profile_lock = threading.Lock()
+
+
+def is_admin(token: str) -> bool:
+    """
+    Check a caller-supplied token against ADMIN_TOKEN
+    """
+    if not ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token, ADMIN_TOKEN)
+
+
+class _AllocationTracker:
+    """
+    Stage hook recording the peak traced memory allocated inside each tracked stage
+
+    Resetting the tracemalloc peak at each stage would lose the run-wide
+    peak, so the peak reached before every reset is kept in peak_total.
+    """
+    def __init__(self, stages: tuple = TRACKED_STAGES):
+        self.stages = stages
+        self.peaks = {}
+        self.peak_total = 0
+        self._baseline = {}
+
+    def enter(self, name: str):
+        if name not in self.stages:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        self.peak_total = max(self.peak_total, peak)
+        # reset_peak is Python 3.9+; older versions report the run-wide peak
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        self._baseline[name] = current
+
+    def exit(self, name: str):
+        if name not in self._baseline:
+            return
+        _, peak = tracemalloc.get_traced_memory()
+        allocated = peak - self._baseline.pop(name)
+        self.peaks[name] = max(self.peaks.get(name, 0), allocated)
+
+
+def _top_functions(profiler: cProfile.Profile, limit: int) -> list:
+    """
+    Summarize the hottest functions by cumulative time
+    """
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    stats.sort_stats('cumulative')
+
+    rows = []
+    for func in stats.fcn_list[:limit]:
+        primitive_calls, total_calls, own_time, cumulative_time, _ = stats.stats[func]
+        filename, line, name = func
+        rows.append({
+            'function': f"{os.path.basename(filename)}:{line}({name})",
+            'calls': total_calls,
+            'own_seconds': round(own_time, 4),
+            'cumulative_seconds': round(cumulative_time, 4),
+        })
+    return rows
+
+
+def run_profiled(fn, *args, **kwargs):
+    """
+    Run fn under cProfile and tracemalloc
+
+    Returns (result, report); the full profile is saved under PROFILE_DIR and
+    the report includes peak allocations for the companyfacts fetch + decode
+    and parse stages
+    """
+    profile_id = uuid.uuid4().hex[:12]
+    tracker = _AllocationTracker()
+    profiler = cProfile.Profile()
+
+    with _profile_lock:
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            with stage_hook(tracker):
+                profiler.enable()
+                try:
+                    result = fn(*args, **kwargs)
+                finally:
+                    profiler.disable()
+        finally:
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            peak_total = max(tracker.peak_total, peak)
+            tracemalloc.stop()
+
+    path = None
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.abspath(os.path.join(PROFILE_DIR, f"{profile_id}.prof"))
+        profiler.dump_stats(path)
+    except OSError as e:
+        print(f"Warning: Could not save profile {profile_id}: {e}")
+        path = None
+
+    report = {
+        'profile_id': profile_id,
+        'path': path,
+        'total_seconds': round(elapsed, 4),
+        'peak_allocations': {name: tracker.peaks.get(name) for name in TRACKED_STAGES},
+        'peak_total': peak_total,
+        'top_functions': _top_functions(profiler, TOP_FUNCTIONS),
+    }
+    return result, report
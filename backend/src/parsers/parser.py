@@ -2,11 +2,22 @@
 import json
 import os
 
+# Tried in order for noncurrent liabilities when total liabilities is not tagged
+NONCURRENT_LIABILITY_TAGS = [
+    'LiabilitiesNoncurrent',
+    'LiabilitiesAndStockholdersEquity',
+    'LongTermDebt',
+    'LiabilitiesOtherThanLongtermDebtNoncurrent'
+]
+
+
 class Parser:
     def __init__(self):
         self.current_fiscal_year = None
         self.prior_fiscal_year = None
         self.alt_tags = self._load_alt_tags()
+        # field -> how its value was obtained: primary tag, fallback tag or derived
+        self.provenance = {}
     
     def _load_alt_tags(self):
         """
@@ -20,11 +31,38 @@ class Parser:
             print(f"Warning: Could not load alt_tags.json: {e}")
             return {}
     
+    def concepts(self) -> set:
+        """
+        Every us-gaap concept parse() may read; the rest of companyfacts can be dropped
+        """
+        concepts = set(NONCURRENT_LIABILITY_TAGS)
+        # Fiscal-year fallback when alt_tags.json has no revenue list
+        concepts.add('Revenues')
+        for category in self.alt_tags.values():
+            for tags in category.values():
+                concepts.update(tags)
+        return concepts
+
+    def prepare_concept(self, taxonomy: str, name: str, concept: dict) -> dict:
+        """
+        Drop the facts parse() never reads from one concept, as it is downloaded
+        Each us-gaap unit keeps its 10-K facts, or all of them when it has none
+        """
+        units = concept.get('units')
+        if taxonomy != 'us-gaap' or not isinstance(units, dict):
+            return concept
+        reduced = {}
+        for unit, all_facts in units.items():
+            ten_k_facts = [f for f in all_facts if f.get('form') in ('10-K', '10-K/A')]
+            reduced[unit] = ten_k_facts or all_facts
+        return dict(concept, units=reduced)
+
     def parse(self, company_facts: dict) -> dict:
         """
         Returns parsed financials
         """
         us_gaap_facts = company_facts['facts'].get('us-gaap', {})
+        self.provenance = {}
         
         # Determine fiscal years first to ensure consistency
         self._determine_fiscal_years(us_gaap_facts)
@@ -37,6 +75,7 @@ class Parser:
                 'current_year': self.current_fiscal_year,
                 'prior_year': self.prior_fiscal_year
             },
+            'provenance': dict(self.provenance),
         }
     
     def _determine_fiscal_years(self, facts: dict):
@@ -90,9 +129,10 @@ class Parser:
         """
         alt_tags = self.alt_tags.get(category, {}).get(field_name, [])
         
-        for tag in alt_tags:
+        for i, tag in enumerate(alt_tags):
             value = self._get_last_10k_value(facts, tag, unit, is_annual)
             if value is not None:
+                self.provenance[field_name] = 'primary' if i == 0 else 'fallback'
                 return value
         return None
     
@@ -103,9 +143,11 @@ class Parser:
         tags = self.alt_tags.get(category, {}).get(field_name, [])
         current, prior = None, None
         
-        for tag in tags:
+        for i, tag in enumerate(tags):
             current, prior = self._get_current_and_prior_year_values(facts, tag, 'USD')
             if current is not None:
+                # Both years come from the same tag, so they share its provenance
+                self.provenance[field_name] = 'primary' if i == 0 else 'fallback'
                 break
         
         if current is not None:
@@ -143,21 +185,15 @@ class Parser:
         # If total_liabilities is still missing, try to calculate from components
         if 'total_liabilities' not in result:
             current_liab = result.get('current_liabilities')
-            noncurrent_tags = [
-                'LiabilitiesNoncurrent',
-                'LiabilitiesAndStockholdersEquity', 
-                'LongTermDebt',
-                'LiabilitiesOtherThanLongtermDebtNoncurrent'
-            ]
-            
             noncurrent_liab = None
-            for tag in noncurrent_tags:
+            for tag in NONCURRENT_LIABILITY_TAGS:
                 noncurrent_liab = self._get_last_10k_value(facts, tag, 'USD', is_annual=False)
                 if noncurrent_liab:
                     break
             
             if current_liab and noncurrent_liab:
                 result['total_liabilities'] = current_liab + noncurrent_liab
+                self.provenance['total_liabilities'] = 'derived'
             
         return result
 
@@ -210,6 +246,7 @@ class Parser:
             value = self._try_alternative_tags(facts, field, 'cashflow_tags', unit, is_annual)
             if value is not None:
                 result[result_key] = value
+                self.provenance[result_key] = self.provenance.pop(field)
 
         return result
 
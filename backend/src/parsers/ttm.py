@@ -0,0 +1,233 @@
+import datetime
+
+from src.parsers.parser import Parser
+
+FILING_FORMS = ('10-Q', '10-Q/A', '10-K', '10-K/A')
+
+# Duration bounds in days for a single fiscal quarter (13 weeks +/- slack)
+QUARTER_DAYS = (80, 100)
+
+# A window ending this many days before the current one is "a year earlier"
+PRIOR_WINDOW_DAYS = (350, 380)
+
+# Largest gap between consecutive quarters still treated as contiguous
+MAX_GAP_DAYS = 10
+
+
+def _date(value: str):
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_quarter(days: int) -> bool:
+    return QUARTER_DAYS[0] <= days <= QUARTER_DAYS[1]
+
+
+class TTMParser(Parser):
+    """
+    Trailing-twelve-month variant of Parser built from 10-Q and 10-K facts
+
+    Flow items (income statement, cash flow) are the sum of the latest four
+    contiguous fiscal quarters. Quarters come from 3-month facts where filed,
+    otherwise from differences of year-to-date facts (Q2 = H1 - Q1,
+    Q4 = annual - nine months, ...). Balance items use the latest quarter end.
+    Output has the same shape as Parser.parse plus a 'period' section.
+    """
+    def __init__(self):
+        super().__init__()
+        self.period_end = None
+        self.prior_period_end = None
+        self._ttm_cache = {}
+        # (tag, unit) -> TTM series built by prepare_concept during the download
+        self._prepared = {}
+        # Tags read as TTM flows; balance-sheet tags never need a series
+        self._flow_tags = {'Revenues'}
+        for category in ('income_statement_tags', 'cashflow_tags'):
+            for tags in self.alt_tags.get(category, {}).values():
+                self._flow_tags.update(tags)
+
+    def parse(self, company_facts: dict) -> dict:
+        self._ttm_cache, self._prepared = self._prepared, {}
+        parsed = super().parse(company_facts)
+        parsed['period'] = {
+            'basis': 'ttm',
+            'end': self.period_end.isoformat() if self.period_end else None,
+            'prior_end': self.prior_period_end.isoformat() if self.prior_period_end else None,
+        }
+        return parsed
+
+    def prepare_concept(self, taxonomy: str, name: str, concept: dict) -> dict:
+        """
+        Keep only valued 10-Q and 10-K facts, the ones the TTM readers use,
+        and build the TTM series of flow tags while the rest of the body downloads
+        """
+        units = concept.get('units')
+        if taxonomy != 'us-gaap' or not isinstance(units, dict):
+            return concept
+        reduced = {}
+        for unit, all_facts in units.items():
+            reduced[unit] = [f for f in all_facts if f.get('form') in FILING_FORMS and f.get('val') is not None]
+            if name in self._flow_tags:
+                self._prepared[(name, unit)] = self._series(reduced[unit])
+        return dict(concept, units=reduced)
+
+    def _unit_key(self, facts: dict, tag: str, unit: str = 'USD') -> str:
+        """
+        Same unit selection as the annual parser; None if the tag is missing
+        """
+        if tag not in facts:
+            return None
+        units = facts[tag].get('units', {})
+        if unit in units:
+            return unit
+        for u in units:
+            if 'usd' in u.lower():
+                return u
+        return next(iter(units), None)
+
+    def _unit_facts(self, facts: dict, tag: str, unit: str = 'USD') -> list:
+        key = self._unit_key(facts, tag, unit)
+        return facts[tag]['units'][key] if key is not None else []
+
+    def _quarters(self, all_facts: list) -> list:
+        """
+        Discrete fiscal quarters as sorted [(start, end, value)]
+
+        One pass over duration facts sorted by (start, end): facts sharing a
+        start date are cumulative year-to-date values of one fiscal year, so
+        each quarter is the difference from the previous cumulative value
+        """
+        latest = {}
+        for f in all_facts:
+            if f.get('form') not in FILING_FORMS or f.get('val') is None:
+                continue
+            start, end = _date(f.get('start')), _date(f.get('end'))
+            if start is None or end is None or end <= start:
+                continue
+            # Restated values (later filings) replace earlier ones
+            key = (start, end)
+            if key not in latest or (f.get('filed') or '') >= latest[key][0]:
+                latest[key] = (f.get('filed') or '', f['val'])
+
+        direct = {}
+        derived = {}
+        group_start, previous_end, previous_value = None, None, None
+        for (start, end) in sorted(latest):
+            value = latest[(start, end)][1]
+            if _is_quarter((end - start).days):
+                direct[end] = (start, value)
+
+            if start != group_start:
+                group_start, previous_end, previous_value = start, None, None
+            if previous_end is not None and _is_quarter((end - previous_end).days):
+                derived[end] = (previous_end + datetime.timedelta(days=1), value - previous_value)
+            previous_end, previous_value = end, value
+
+        # Reported 3-month values win over derived ones
+        derived.update(direct)
+        return sorted((start, end, value) for end, (start, value) in derived.items())
+
+    def _ttm_series(self, facts: dict, tag: str, unit: str = 'USD') -> dict:
+        """
+        end date -> trailing four-quarter sum for the tag, cached per unit
+        """
+        unit_key = self._unit_key(facts, tag, unit)
+        if unit_key is None:
+            return {}
+        key = (tag, unit_key)
+        if key not in self._ttm_cache:
+            self._ttm_cache[key] = self._series(facts[tag]['units'][unit_key])
+        return self._ttm_cache[key]
+
+    def _series(self, all_facts: list) -> dict:
+        """
+        end date -> trailing four-quarter sum, computed with a running window
+        """
+        series = {}
+        window = []
+        total = 0
+        for start, end, value in self._quarters(all_facts):
+            if window and (start - window[-1][1]).days > MAX_GAP_DAYS:
+                window, total = [], 0
+            if window and start <= window[-1][1]:
+                # Overlapping quarter (fiscal calendar change), restart the window
+                window, total = [], 0
+            window.append((start, end, value))
+            total += value
+            if len(window) > 4:
+                total -= window.pop(0)[2]
+            if len(window) == 4:
+                series[end] = total
+        return series
+
+    def _determine_fiscal_years(self, facts: dict):
+        """
+        Anchor the TTM period on the latest complete revenue window
+        """
+        self.period_end = None
+        self.prior_period_end = None
+        self.current_fiscal_year = None
+        self.prior_fiscal_year = None
+
+        revenue_tags = self.alt_tags.get('income_statement_tags', {}).get('revenue', ['Revenues'])
+        for tag in revenue_tags:
+            series = self._ttm_series(facts, tag)
+            if not series:
+                continue
+            self.period_end = max(series)
+            self.current_fiscal_year = self.period_end.year
+            self.prior_period_end = self._prior_end(series, self.period_end)
+            if self.prior_period_end is not None:
+                self.prior_fiscal_year = self.prior_period_end.year
+            return
+
+    def _prior_end(self, series: dict, end):
+        """
+        Window end roughly one year before end, if present
+        """
+        for candidate in sorted(series, reverse=True):
+            if PRIOR_WINDOW_DAYS[0] <= (end - candidate).days <= PRIOR_WINDOW_DAYS[1]:
+                return candidate
+        return None
+
+    def _ttm_value_at(self, series: dict, end):
+        if end is None or not series:
+            return None
+        if end in series:
+            return series[end]
+        # Same fiscal quarter with a slightly different end date (52/53-week years)
+        for candidate, value in series.items():
+            if abs((candidate - end).days) <= MAX_GAP_DAYS:
+                return value
+        return None
+
+    def _get_last_10k_value(self, facts: dict, tag: str, unit: str = 'USD', is_annual: bool = True) -> float:
+        """
+        Flow items: TTM value at the anchor period; balance items: latest quarter-end value
+        """
+        if is_annual:
+            return self._ttm_value_at(self._ttm_series(facts, tag, unit), self.period_end)
+
+        best = None
+        for f in self._unit_facts(facts, tag, unit):
+            if f.get('form') not in FILING_FORMS or f.get('val') is None or f.get('start'):
+                continue
+            end = _date(f.get('end'))
+            if end is None or (self.period_end is not None and end > self.period_end):
+                continue
+            key = (end, f.get('filed') or '')
+            if best is None or key > best[0]:
+                best = (key, f['val'])
+        return best[1] if best else None
+
+    def _get_current_and_prior_year_values(self, facts: dict, tag: str, unit: str = 'USD'):
+        """
+        TTM value at the anchor period and one year earlier
+        """
+        series = self._ttm_series(facts, tag, unit)
+        return (
+            self._ttm_value_at(series, self.period_end),
+            self._ttm_value_at(series, self.prior_period_end),
+        )
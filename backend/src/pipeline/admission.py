@@ -0,0 +1,182 @@
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from src.monitoring.metrics import ADMISSION_WAIT_SECONDS, CACHE_REQUESTS
+
+# Memory that concurrent fetch/decode/parse jobs may hold between them
+MEMORY_BUDGET_BYTES = int(float(os.getenv('MEMORY_BUDGET_MB', '1024')) * 1024 * 1024)
+
+# Peak memory per byte of JSON: companyfacts is decoded as it downloads and
+# only the concepts the parser reads are kept (decoded dicts take roughly
+# 4-5x their JSON size), plus the raw body when recording to the archive
+MEMORY_PER_JSON_BYTE = float(os.getenv('MEMORY_PER_JSON_BYTE', '2'))
+
+# Typical companyfacts gzip compression ratio, for a compressed Content-Length
+GZIP_RATIO = 10
+
+# Assumed JSON size when neither history nor Content-Length is available
+DEFAULT_JSON_BYTES = 5 * 1024 * 1024
+
+# Once the oldest waiting job has waited this long, later (smaller) jobs
+# stop running ahead of it so it cannot starve
+MAX_BYPASS_SECONDS = float(os.getenv('ADMISSION_MAX_BYPASS_SECONDS', '10'))
+
+# Longest single wait between deadline checks
+_POLL_SECONDS = 0.25
+
+_current_job = ContextVar('memory_job', default=None)
+
+
+class MemoryAdmission:
+    """
+    Admits jobs while their estimated memory fits within a budget
+
+    Waiting jobs are not strictly FIFO: when memory frees up, any waiting job
+    that fits may start, so small jobs run ahead of a queued large one. A job
+    larger than the whole budget runs alone. After the oldest waiter has
+    waited MAX_BYPASS_SECONDS, only it may start next.
+    """
+    def __init__(self, budget_bytes: int = MEMORY_BUDGET_BYTES, max_bypass_seconds: float = MAX_BYPASS_SECONDS,
+                 clock=time.monotonic):
+        self.budget = budget_bytes
+        self.max_bypass_seconds = max_bypass_seconds
+        self.clock = clock
+        self.in_use = 0
+        self.running = 0
+        self._waiting = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def _can_start(self, ticket: int, cost: int) -> bool:
+        if self._waiting:
+            oldest = min(self._waiting)
+            if ticket != oldest and self.clock() - self._waiting[oldest] >= self.max_bypass_seconds:
+                return False
+        return self.running == 0 or self.in_use + cost <= self.budget
+
+    def acquire(self, cost: int, deadline=None):
+        """
+        Block until cost bytes fit in the budget
+        The deadline (if any) is checked while waiting
+        """
+        start = self.clock()
+        with self._condition:
+            ticket = next(self._sequence)
+            self._waiting[ticket] = start
+            try:
+                while not self._can_start(ticket, cost):
+                    if deadline is not None:
+                        deadline.check('admission')
+                        remaining = deadline.remaining()
+                        wait = _POLL_SECONDS if remaining is None else max(min(_POLL_SECONDS, remaining), 0.001)
+                    else:
+                        wait = _POLL_SECONDS
+                    self._condition.wait(wait)
+            finally:
+                del self._waiting[ticket]
+                # A blocked head-of-line change can let others through
+                self._condition.notify_all()
+            self.in_use += cost
+            self.running += 1
+        ADMISSION_WAIT_SECONDS.observe(self.clock() - start)
+
+    def release(self, cost: int):
+        with self._condition:
+            self.in_use -= cost
+            self.running -= 1
+            self._condition.notify_all()
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                'budget_bytes': self.budget,
+                'in_use_bytes': self.in_use,
+                'running': self.running,
+                'waiting': len(self._waiting),
+            }
+
+
+_admission = MemoryAdmission()
+
+# CIK -> decoded JSON size of its last companyfacts download
+_sizes = {}
+_sizes_lock = threading.Lock()
+
+
+def get_admission() -> MemoryAdmission:
+    return _admission
+
+
+def known_size(key: str) -> int:
+    with _sizes_lock:
+        size = _sizes.get(key)
+    CACHE_REQUESTS.inc(cache='payload_size', result='hit' if size is not None else 'miss')
+    return size
+
+
+def record_size(key: str, size: int):
+    with _sizes_lock:
+        _sizes[key] = size
+
+
+def estimate_json_bytes(content_length: str = None, content_encoding: str = None) -> int:
+    """
+    Decoded JSON size implied by response headers, DEFAULT_JSON_BYTES if unknown
+    """
+    try:
+        size = int(content_length)
+    except (TypeError, ValueError):
+        return DEFAULT_JSON_BYTES
+    if content_encoding and 'gzip' in content_encoding.lower():
+        size *= GZIP_RATIO
+    return size
+
+
+class _Job:
+    """
+    Memory reserved for one fetch -> decode -> parse run (one payload at most)
+    """
+    def __init__(self, admission: MemoryAdmission):
+        self.admission = admission
+        self.cost = None
+
+    def reserve(self, json_bytes: int, deadline=None):
+        cost = int(json_bytes * MEMORY_PER_JSON_BYTE)
+        self.admission.acquire(cost, deadline)
+        self.cost = cost
+
+    def release(self):
+        if self.cost is not None:
+            self.admission.release(self.cost)
+            self.cost = None
+
+
+@contextmanager
+def memory_job(admission: MemoryAdmission = None):
+    """
+    Scope one job; payload downloads inside it reserve memory before they start
+    and everything is released when the scope exits
+    """
+    job = _Job(admission or _admission)
+    token = _current_job.set(job)
+    try:
+        yield job
+    finally:
+        _current_job.reset(token)
+        job.release()
+
+
+def reserve_payload(json_bytes: int, deadline=None) -> bool:
+    """
+    Reserve memory for a payload in the current job (no-op outside memory_job)
+    Returns True if a reservation was made
+    """
+    job = _current_job.get()
+    if job is None or job.cost is not None:
+        return False
+    job.reserve(json_bytes, deadline)
+    return True
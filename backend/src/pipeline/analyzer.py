@@ -0,0 +1,220 @@
+from src.data.sec_client import SECClient
+from src.parsers.parser import Parser
+from src.parsers.ttm import TTMParser
+from src.models.bankruptcy_score import get_ohlson_oscore
+from src.features.ratios_and_trends import (
+    get_liquidity_ratios,
+    get_leverage_ratios,
+    get_profitability_ratios,
+    get_cash_flow_ratios,
+    get_revenue_pct_change,
+    get_net_income_pct_change
+)
+from src.scoring.composite_score import calculate_composite
+from src.scoring.interpreter import get_recommendation
+from src.scoring.uncertainty import score_bands, seed_for
+from src.monitoring.metrics import stage
+from src.pipeline.admission import memory_job
+from src.pipeline.prescreen import known_unsupported, record_unsupported, unsupported_industry
+
+
+# Inputs the parser never provides (or may miss) that default to 0
+DEFAULTED_FIELDS = ('inventory', 'capital_expenditure')
+
+# Scoring bases: latest 10-K, or trailing twelve months from 10-Q facts
+BASES = ('annual', 'ttm')
+
+
+class TickerNotFoundError(LookupError):
+    """Ticker is not in the SEC ticker -> CIK mapping"""
+
+
+class UnsupportedFilerError(ValueError):
+    """Filing lacks the tags the score needs (typically banks, insurers, REITs)"""
+
+
+def build_facts(parsed: dict) -> dict:
+    """
+    Combine parsed statements into the flat facts dict the scoring functions expect
+    """
+    facts = {}
+    facts.update(parsed['balance_sheet'])
+    facts.update(parsed['income_statement'])
+    facts.update(parsed['cash_flow'])
+
+    # Handle missing data
+    for field in DEFAULTED_FIELDS:
+        if field not in facts or facts[field] is None:
+            facts[field] = 0
+
+    return facts
+
+
+def fact_provenance(parsed: dict) -> dict:
+    """
+    Parser provenance plus 'default' for fields build_facts filled with 0
+    """
+    provenance = dict(parsed.get('provenance') or {})
+    sections = (parsed.get('balance_sheet', {}), parsed.get('income_statement', {}), parsed.get('cash_flow', {}))
+    for field in DEFAULTED_FIELDS:
+        if not any(section.get(field) is not None for section in sections):
+            provenance[field] = 'default'
+    return provenance
+
+
+def is_supported(facts: dict) -> bool:
+    """
+    Financial institutions usually lack a classified balance sheet
+    """
+    return 'current_assets' in facts and 'current_liabilities' in facts
+
+
+def score_facts(facts: dict) -> dict:
+    """
+    Calculate metrics, composite score and recommendation for a facts dict
+    """
+    with stage('scoring'):
+        o_score = get_ohlson_oscore(facts)
+        liq = get_liquidity_ratios(facts)
+        lev = get_leverage_ratios(facts)
+        prof = get_profitability_ratios(facts)
+        cf = get_cash_flow_ratios(facts)
+
+        revenue_growth = get_revenue_pct_change(facts)
+        ni_growth = get_net_income_pct_change(facts)
+
+        composite_result = calculate_composite(facts)
+        score = composite_result['score']
+
+        rec = get_recommendation(score)
+
+    return {
+        'score': round(score, 2),
+        'grade': composite_result['grade'],
+        'risk_level': composite_result['risk_level'],
+        'recommendation': rec['rating'],
+        'alert_level': rec['alert_level'],
+        # Parse hold and new_investment responses
+        'hold_position': rec['hold'].lower() in ['yes', 'review'],
+        'new_investment': rec['new_investment'].lower() in ['consider', 'maybe'],
+        'components': composite_result['components'],
+        'metrics': {
+            "ohlson_o_score": round(o_score, 3),
+            "current_ratio": round(liq['current_ratio'], 2),
+            "quick_ratio": round(liq['quick_ratio'], 2),
+            "debt_to_equity": round(lev['debt_to_equity'], 2),
+            "interest_coverage": round(lev['interest_coverage_ratio'], 2),
+            "roa": round(prof['ROA'], 2),
+            "net_profit_margin": round(prof['net_profit_margin'], 3),
+            "operating_cf_ratio": round(cf['operating_cash_flow'], 2),
+            "free_cf_to_assets": round(cf['free_cash_flow_to_assets'], 3),
+            "revenue_growth": round(revenue_growth, 2) if revenue_growth is not None else None,
+            "net_income_growth": round(ni_growth, 2) if ni_growth is not None else None,
+        },
+        'financials': {
+            "total_assets": facts.get('total_assets', 0),
+            "revenue": facts.get('revenue_current', 0),
+            "net_income": facts.get('net_income_current', 0),
+            "operating_cash_flow": facts.get('operating_cash_flow', 0),
+        },
+    }
+
+
+def analyze(ticker: str, client: SECClient = None, basis: str = 'annual', uncertainty: bool = False) -> dict:
+    """
+    Run the full fetch -> parse -> score pipeline for one ticker
+    basis='ttm' scores trailing-twelve-month figures built from 10-Q facts
+    uncertainty=True adds Monte Carlo score bands ('uncertainty')
+
+    Returns a dict with the AnalysisResponse fields plus the composite components
+    and the parsed facts they were computed from
+    Raises TickerNotFoundError or UnsupportedFilerError for expected failures
+    """
+    ticker = ticker.upper()
+    if basis not in BASES:
+        raise ValueError(f"Unknown basis {basis}, expected one of {BASES}")
+    if client is None:
+        client = SECClient()
+
+    try:
+        cik = client.get_cik(ticker)
+    except ValueError:
+        raise TickerNotFoundError(f"Ticker {ticker} not found")
+
+    # Submissions are small; reject known-unsupported filers before the companyfacts download
+    company = client.get_company_info(ticker)
+    filing_info = client.get_latest_10k_filing_info(ticker)
+    accession = filing_info.get('accessionNumber') if filing_info else None
+
+    industry = unsupported_industry(company['sic'])
+    if industry:
+        raise UnsupportedFilerError(
+            f"{industry} (SIC {company['sic']}) are not supported: their filings lack the current assets and liabilities the score needs."
+        )
+    reason = known_unsupported(cik, accession, basis)
+    if reason:
+        raise UnsupportedFilerError(reason)
+
+    # The raw companyfacts payload is only alive inside the memory job
+    with memory_job():
+        parser = TTMParser() if basis == 'ttm' else Parser()
+        # Each concept is reduced to the facts parse() reads while the body downloads
+        data = client.get_latest_10k(ticker, concepts=parser.concepts(), on_concept=parser.prepare_concept)
+
+        with stage('parse'):
+            parsed = parser.parse(data)
+        del data
+
+    # Check data quality
+    is_stale = False
+    filing_year = None
+    data_fy = parsed.get('fiscal_years', {}).get('current_year')
+
+    if filing_info and data_fy:
+        filing_year = int(filing_info['reportDate'][:4])
+        if (filing_year - data_fy) >= 2:
+            is_stale = True
+
+    # Get fiscal years
+    fiscal_years = parsed.get('fiscal_years', {})
+    current_fy = fiscal_years.get('current_year', 'N/A')
+    prior_fy = fiscal_years.get('prior_year')
+    period = parsed.get('period', {})
+
+    if basis == 'ttm' and not period.get('end'):
+        raise UnsupportedFilerError("Not enough quarterly data to build trailing-twelve-month figures.")
+
+    facts = build_facts(parsed)
+
+    if not is_supported(facts):
+        reason = "Required financial data not found in 10-K filing. This typically occurs with banks, insurance companies, or incomplete filings."
+        record_unsupported(cik, accession, reason, basis)
+        raise UnsupportedFilerError(reason)
+
+    result = {
+        'ticker': ticker,
+        'cik': cik,
+        'company_name': company['name'],
+        'sic': company['sic'],
+        'sic_description': company['sic_description'],
+        'basis': basis,
+    }
+    if basis == 'ttm':
+        result['current_year'] = f"TTM {period['end']}" if period.get('end') else "TTM N/A"
+        result['prior_year'] = f"TTM {period['prior_end']}" if period.get('prior_end') else None
+    else:
+        result['current_year'] = f"FY{current_fy}"
+        result['prior_year'] = f"FY{prior_fy}" if prior_fy else None
+    result.update(score_facts(facts))
+    result['data_quality'] = {
+        "is_stale": is_stale,
+        "filing_year": filing_year,
+        "data_year": data_fy,
+        "period_end": period.get('end'),
+    }
+    result['facts'] = facts
+    result['provenance'] = fact_provenance(parsed)
+    if uncertainty:
+        with stage('uncertainty'):
+            result['uncertainty'] = score_bands(facts, result['provenance'], seed=seed_for(cik))
+    return result
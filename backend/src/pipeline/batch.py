@@ -0,0 +1,125 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from src.data.sec_client import SECClient
+from src.pipeline.analyzer import analyze, TickerNotFoundError, UnsupportedFilerError
+from src.pipeline.deadline import (
+    BATCH_TICKER_TIMEOUT,
+    Deadline,
+    DeadlineExceeded,
+    RequestCancelled,
+    deadline_scope,
+)
+
+# Tickers analyzed concurrently; SEC requests still share the process-wide rate limiter
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', '4'))
+
+# Largest number of tickers accepted in one batch request
+BATCH_MAX_TICKERS = int(os.getenv('BATCH_MAX_TICKERS', '500'))
+
+
+def _unique_tickers(tickers: list) -> list:
+    seen = set()
+    unique = []
+    for ticker in tickers:
+        ticker = ticker.strip().upper()
+        if ticker and ticker not in seen:
+            seen.add(ticker)
+            unique.append(ticker)
+    return unique
+
+
+def submit_in_context(pool, fn, *args):
+    """
+    pool.submit(fn, *args) in a copy of the caller's context
+    Keeps request deadlines, stage timings and stage hooks in worker threads
+    """
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def analyze_one(ticker: str, basis: str, client: SECClient, deadline: Deadline = None) -> dict:
+    """
+    analyze() with the outcome recorded in a status field instead of raised
+    Each ticker gets its own deadline within the batch deadline
+    """
+    try:
+        ticker_deadline = Deadline(BATCH_TICKER_TIMEOUT, parent=deadline)
+        with deadline_scope(ticker_deadline):
+            ticker_deadline.check('queue')
+            result = analyze(ticker, client=client, basis=basis)
+        result['status'] = 'ok'
+        return result
+    except DeadlineExceeded as e:
+        status, error = 'timeout', str(e)
+    except RequestCancelled as e:
+        status, error = 'cancelled', str(e)
+    except TickerNotFoundError as e:
+        status, error = 'not_found', str(e)
+    except UnsupportedFilerError as e:
+        status, error = 'unsupported', str(e)
+    except Exception as e:
+        status, error = 'error', f"Analysis failed: {str(e)}"
+    return {'ticker': ticker, 'basis': basis, 'status': status, 'error': error}
+
+
+def analyze_batch(tickers: list, basis: str = 'annual', store=None, workers: int = BATCH_WORKERS,
+                  deadline: Deadline = None) -> list:
+    """
+    Analyze many tickers, one result per unique ticker in request order
+
+    Failed tickers get status 'not_found', 'unsupported', 'timeout',
+    'cancelled' or 'error' instead of failing the batch; once the batch
+    deadline passes (or it is cancelled) the remaining tickers stop early.
+    Annual results are saved to the score store and every successful result
+    gets peer percentiles when a store is given.
+    """
+    tickers = _unique_tickers(tickers)
+    client = SECClient()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [submit_in_context(pool, analyze_one, ticker, basis, client, deadline) for ticker in tickers]
+        results = [future.result() for future in futures]
+
+    if store is not None:
+        for position, result in enumerate(results):
+            if result['status'] != 'ok':
+                continue
+            if basis == 'annual':
+                result = store.put(result)
+            results[position] = dict(result, peer_percentiles=store.peer_percentiles(result))
+
+    return results
+
+
+def screen(store, grades: list = None, min_score: float = None, max_score: float = None,
+           sic: str = None, alert_level: str = None, limit: int = None) -> list:
+    """
+    Stored results matching the filters, most distressed (highest score) first
+
+    sic matches as a prefix, so '28' selects the whole chemicals major group
+    """
+    grades = set(g.upper() for g in grades) if grades else None
+    matches = []
+    for _, result in store.items():
+        score = result.get('score')
+        if grades is not None and result.get('grade') not in grades:
+            continue
+        if min_score is not None and (score is None or score < min_score):
+            continue
+        if max_score is not None and (score is None or score > max_score):
+            continue
+        if sic and not str(result.get('sic') or '').startswith(sic):
+            continue
+        if alert_level and result.get('alert_level') != alert_level:
+            continue
+        matches.append(result)
+
+    matches.sort(key=lambda result: result.get('score') or 0, reverse=True)
+    if limit is not None:
+        matches = matches[:limit]
+
+    return [
+        dict(result, status='ok', peer_percentiles=store.peer_percentiles(result))
+        for result in matches
+    ]
@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from src.monitoring.metrics import stage_hook
+
+# Default and maximum time budget for one /analyze request, in seconds
+ANALYZE_TIMEOUT = float(os.getenv('ANALYZE_TIMEOUT', '30'))
+
+# Time budget for each ticker in a batch, within the batch's own deadline
+BATCH_TICKER_TIMEOUT = float(os.getenv('BATCH_TICKER_TIMEOUT', '30'))
+
+_current = ContextVar('deadline', default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request ran past its deadline"""
+
+
+class RequestCancelled(Exception):
+    """The client went away, so nobody will read the answer"""
+
+
+class Deadline:
+    """
+    Point in time after which work for a request should stop, plus a cancel flag
+
+    A child deadline expires no later than its parent and is cancelled with it.
+    While installed with deadline_scope(), it is checked as each pipeline stage
+    starts and between chunks of SEC downloads.
+    """
+    def __init__(self, seconds: float = None, parent: 'Deadline' = None, clock=time.monotonic):
+        self.clock = clock
+        self.parent = parent
+        self.expires_at = clock() + seconds if seconds is not None else None
+        if parent is not None and parent.expires_at is not None:
+            if self.expires_at is None or parent.expires_at < self.expires_at:
+                self.expires_at = parent.expires_at
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set() or (self.parent is not None and self.parent.cancelled)
+
+    def remaining(self) -> float:
+        """
+        Seconds left, or None without a time limit
+        """
+        if self.expires_at is None:
+            return None
+        return self.expires_at - self.clock()
+
+    def timeout(self, default: float) -> float:
+        """
+        Socket timeout for the next upstream call: default, capped by the time left
+        """
+        remaining = self.remaining()
+        return default if remaining is None else max(min(default, remaining), 0.001)
+
+    def check(self, during: str = None):
+        """
+        Raise RequestCancelled or DeadlineExceeded if work should stop
+        """
+        where = f" during {during}" if during else ""
+        if self.cancelled:
+            raise RequestCancelled(f"Request cancelled{where}")
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded(f"Deadline exceeded{where}")
+
+    # Stage hook interface (see metrics.stage_hook)
+    def enter(self, name: str):
+        self.check(name)
+
+    def exit(self, name: str):
+        pass
+
+
+def current_deadline() -> Deadline:
+    """
+    Deadline installed for the current context, or None
+    """
+    return _current.get()
+
+
+def check_deadline(during: str = None):
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check(during)
+
+
+@contextmanager
+def deadline_scope(deadline: Deadline):
+    """
+    Make deadline current and check it at the start of every stage run in this context
+    """
+    token = _current.set(deadline)
+    try:
+        with stage_hook(deadline):
+            yield deadline
+    finally:
+        _current.reset(token)
+
+
+def run_with_deadline(deadline: Deadline, fn, *args, **kwargs):
+    """
+    Call fn inside deadline_scope (for use as an executor target)
+    """
+    with deadline_scope(deadline):
+        return fn(*args, **kwargs)
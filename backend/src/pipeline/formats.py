@@ -0,0 +1,240 @@
+"""
+Columnar serialization of bulk analysis results
+
+Results are flattened straight into one list per column and encoded as
+column-oriented JSON (optionally gzip-compressed) or an Arrow IPC stream,
+without building a response model per row.
+"""
+import gzip
+import json
+import math
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+JSON_MEDIA_TYPE = 'application/json'
+ARROW_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+
+# Short names accepted by ?format= as an alternative to the Accept header
+FORMAT_ALIASES = {
+    'json': JSON_MEDIA_TYPE,
+    'arrow': ARROW_MEDIA_TYPE,
+}
+
+# Responses smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+
+# (column, section of the result dict or None for top level, key, type)
+COLUMNS = [
+    ('ticker', None, 'ticker', 'str'),
+    ('cik', None, 'cik', 'str'),
+    ('company_name', None, 'company_name', 'str'),
+    ('sic', None, 'sic', 'str'),
+    ('sic_description', None, 'sic_description', 'str'),
+    ('basis', None, 'basis', 'str'),
+    ('status', None, 'status', 'str'),
+    ('error', None, 'error', 'str'),
+    ('current_year', None, 'current_year', 'str'),
+    ('prior_year', None, 'prior_year', 'str'),
+    ('score', None, 'score', 'float'),
+    ('grade', None, 'grade', 'str'),
+    ('risk_level', None, 'risk_level', 'str'),
+    ('recommendation', None, 'recommendation', 'str'),
+    ('alert_level', None, 'alert_level', 'str'),
+    ('hold_position', None, 'hold_position', 'bool'),
+    ('new_investment', None, 'new_investment', 'bool'),
+    ('ohlson_o_score', 'metrics', 'ohlson_o_score', 'float'),
+    ('current_ratio', 'metrics', 'current_ratio', 'float'),
+    ('quick_ratio', 'metrics', 'quick_ratio', 'float'),
+    ('debt_to_equity', 'metrics', 'debt_to_equity', 'float'),
+    ('interest_coverage', 'metrics', 'interest_coverage', 'float'),
+    ('roa', 'metrics', 'roa', 'float'),
+    ('net_profit_margin', 'metrics', 'net_profit_margin', 'float'),
+    ('operating_cf_ratio', 'metrics', 'operating_cf_ratio', 'float'),
+    ('free_cf_to_assets', 'metrics', 'free_cf_to_assets', 'float'),
+    ('revenue_growth', 'metrics', 'revenue_growth', 'float'),
+    ('net_income_growth', 'metrics', 'net_income_growth', 'float'),
+    ('total_assets', 'financials', 'total_assets', 'float'),
+    ('revenue', 'financials', 'revenue', 'float'),
+    ('net_income', 'financials', 'net_income', 'float'),
+    ('operating_cash_flow', 'financials', 'operating_cash_flow', 'float'),
+    ('is_stale', 'data_quality', 'is_stale', 'bool'),
+    ('filing_year', 'data_quality', 'filing_year', 'int'),
+    ('data_year', 'data_quality', 'data_year', 'int'),
+    ('period_end', 'data_quality', 'period_end', 'str'),
+    ('peer_group', 'peer_percentiles', 'peer_group', 'str'),
+    ('peer_count', 'peer_percentiles', 'peer_count', 'int'),
+    ('peer_percentile', 'peer_percentiles', 'score_percentile', 'float'),
+    ('scored_at', None, 'scored_at', 'float'),
+]
+
+
+class NotAcceptableError(ValueError):
+    """None of the requested media types can be produced"""
+
+
+def _clean(value, kind: str):
+    """
+    Coerce a value to its column type; NaN/inf and unparseable values become None
+    """
+    if value is None:
+        return None
+    if kind == 'float':
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None
+        return value if math.isfinite(value) else None
+    if kind == 'int':
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    if kind == 'bool':
+        return bool(value)
+    return str(value)
+
+
+def _sections(result: dict) -> dict:
+    # The score percentile is nested one level deeper than other peer fields
+    peers = result.get('peer_percentiles') or {}
+    return {
+        None: result,
+        'metrics': result.get('metrics') or {},
+        'financials': result.get('financials') or {},
+        'data_quality': result.get('data_quality') or {},
+        'peer_percentiles': dict(peers, score_percentile=(peers.get('percentiles') or {}).get('score')),
+    }
+
+
+def to_columns(results: list) -> dict:
+    """
+    Flatten result dicts into {column: [values]} in a single pass
+    """
+    columns = {name: [] for name, _, _, _ in COLUMNS}
+    appenders = [(columns[name].append, section, key, kind) for name, section, key, kind in COLUMNS]
+
+    for result in results:
+        sections = _sections(result)
+        for append, section, key, kind in appenders:
+            append(_clean(sections[section].get(key), kind))
+
+    return columns
+
+
+def to_row(result: dict) -> dict:
+    """
+    One result flattened to {column: value}, for row-oriented writers such as CSV
+    """
+    sections = _sections(result)
+    return {name: _clean(sections[section].get(key), kind) for name, section, key, kind in COLUMNS}
+
+
+def negotiate(accept: str = None, format_name: str = None) -> str:
+    """
+    Pick the response media type from ?format= or the Accept header
+
+    Raises NotAcceptableError when nothing acceptable can be produced
+    (including Arrow when pyarrow is not installed)
+    """
+    if format_name:
+        media_type = FORMAT_ALIASES.get(format_name.lower())
+        if media_type is None:
+            raise NotAcceptableError(f"Unknown format {format_name}, expected one of {sorted(FORMAT_ALIASES)}")
+        if media_type == ARROW_MEDIA_TYPE and pa is None:
+            raise NotAcceptableError("Arrow output requires pyarrow to be installed")
+        return media_type
+
+    if not accept:
+        return JSON_MEDIA_TYPE
+
+    # Media ranges ordered by quality, keeping the client's order among ties
+    ranges = []
+    for position, part in enumerate(accept.split(',')):
+        fields = [field.strip() for field in part.split(';')]
+        quality = 1.0
+        for param in fields[1:]:
+            if param.startswith('q='):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if fields[0] and quality > 0:
+            ranges.append((-quality, position, fields[0].lower()))
+
+    for _, _, media_range in sorted(ranges):
+        if media_range == ARROW_MEDIA_TYPE and pa is not None:
+            return ARROW_MEDIA_TYPE
+        if media_range in (JSON_MEDIA_TYPE, 'application/*', '*/*'):
+            return JSON_MEDIA_TYPE
+
+    if any(media_range == ARROW_MEDIA_TYPE for _, _, media_range in ranges):
+        raise NotAcceptableError("Arrow output requires pyarrow to be installed")
+    raise NotAcceptableError(f"Supported media types: {JSON_MEDIA_TYPE}, {ARROW_MEDIA_TYPE}")
+
+
+def accepts_gzip(accept_encoding: str = None) -> bool:
+    for part in (accept_encoding or '').split(','):
+        fields = [field.strip() for field in part.split(';')]
+        if fields[0].lower() == 'gzip':
+            return not any(param.replace(' ', '') in ('q=0', 'q=0.0') for param in fields[1:])
+    return False
+
+
+def _arrow_type(kind: str):
+    return {
+        'str': pa.string(),
+        'float': pa.float64(),
+        'int': pa.int64(),
+        'bool': pa.bool_(),
+    }[kind]
+
+
+def arrow_schema():
+    """
+    Fixed Arrow schema of COLUMNS, so empty results keep their column types
+    """
+    return pa.schema([(name, _arrow_type(kind)) for name, _, _, kind in COLUMNS])
+
+
+def encode_arrow(columns: dict) -> bytes:
+    """
+    Arrow IPC stream of the columns
+    """
+    schema = arrow_schema()
+    table = pa.Table.from_pydict(columns, schema=schema)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_json(columns: dict, extra: dict = None) -> bytes:
+    """
+    {"count": n, "columns": {name: [values]}, ...extra}
+    """
+    count = len(next(iter(columns.values()))) if columns else 0
+    body = dict(extra or {}, count=count, columns=columns)
+    return json.dumps(body, separators=(',', ':')).encode('utf-8')
+
+
+def encode(results: list, media_type: str, gzip_ok: bool = False, extra: dict = None):
+    """
+    Serialize results for a negotiated media type
+
+    Returns (body, headers); JSON is gzip-compressed when the client accepts it.
+    extra fields are only included in JSON (Arrow carries just the table).
+    """
+    columns = to_columns(results)
+    headers = {'Vary': 'Accept, Accept-Encoding'}
+
+    if media_type == ARROW_MEDIA_TYPE:
+        return encode_arrow(columns), headers
+
+    body = encode_json(columns, extra)
+    if gzip_ok and len(body) >= GZIP_MIN_BYTES:
+        body = gzip.compress(body, compresslevel=6)
+        headers['Content-Encoding'] = 'gzip'
+    return body, headers
@@ -0,0 +1,64 @@
+import json
+import os
+import threading
+
+from src.monitoring.metrics import CACHE_REQUESTS
+
+UNSUPPORTED_SIC_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'unsupported_sic.json')
+
+
+def _load_unsupported_ranges(path: str = UNSUPPORTED_SIC_PATH) -> list:
+    """
+    [(low, high, industry)] from config/unsupported_sic.json
+    """
+    try:
+        with open(path) as f:
+            config = json.load(f)
+        return [(int(r['from']), int(r['to']), r.get('industry') or 'Unsupported industry') for r in config['ranges']]
+    except Exception as e:
+        print(f"Warning: Could not load unsupported_sic.json, SIC pre-screen disabled: {e}")
+        return []
+
+
+_unsupported_ranges = _load_unsupported_ranges()
+
+# (CIK, 10-K accession number, basis) -> reason the filing could not be scored
+# A new 10-K has a new accession number, so it is always tried again; the
+# annual and TTM parsers read different facts, so each basis is cached apart
+_unsupported_filings = {}
+_unsupported_lock = threading.Lock()
+
+
+def unsupported_industry(sic) -> str:
+    """
+    Industry name if the SIC code is in an unsupported range, else None
+    """
+    try:
+        code = int(sic)
+    except (TypeError, ValueError):
+        return None
+    for low, high, industry in _unsupported_ranges:
+        if low <= code <= high:
+            return industry
+    return None
+
+
+def known_unsupported(cik: str, accession: str, basis: str = 'annual') -> str:
+    """
+    Cached reason this filing was unsupported, or None
+    """
+    if not accession:
+        return None
+    with _unsupported_lock:
+        reason = _unsupported_filings.get((cik, accession, basis))
+    CACHE_REQUESTS.inc(cache='unsupported_filing', result='hit' if reason is not None else 'miss')
+    return reason
+
+
+def record_unsupported(cik: str, accession: str, reason: str, basis: str = 'annual'):
+    """
+    Remember that this filing lacks the required tags (no-op without an accession)
+    """
+    if accession:
+        with _unsupported_lock:
+            _unsupported_filings[(cik, accession, basis)] = reason
@@ -0,0 +1,53 @@
+"""Score many companies offline: python -m src.scorer (--tickers FILE | --universe) -o OUTPUT"""
+
+import argparse
+import os
+import sys
+
+from src.data.sec_client import SECClient
+from src.pipeline.analyzer import BASES
+from src.pipeline.batch import BATCH_WORKERS
+from src.scorer.runner import FLUSH_ROWS, OUTPUT_FORMATS, read_tickers, run, universe_tickers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a ticker list or the whole SEC universe, resumably")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--tickers', help="File with one ticker per line, or a comma-separated list")
+    source.add_argument('--universe', action='store_true', help="Every company in the SEC ticker map")
+    parser.add_argument('-o', '--output', required=True, help="CSV file, or directory of Parquet parts")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default=None,
+                        help="Output format (default: parquet if the output ends in .parquet, else csv)")
+    parser.add_argument('--basis', choices=BASES, default='annual')
+    parser.add_argument('--workers', type=int, default=BATCH_WORKERS, help="Tickers analyzed concurrently")
+    parser.add_argument('--checkpoint', help="Checkpoint file (default: OUTPUT.checkpoint)")
+    parser.add_argument('--flush-rows', type=int, default=FLUSH_ROWS, help="Rows per output flush")
+    args = parser.parse_args()
+
+    output_format = args.format or ('parquet' if args.output.rstrip('/').endswith('.parquet') else 'csv')
+
+    client = SECClient()
+    if args.universe:
+        if not client.companies:
+            sys.exit("Error: SEC ticker map is unavailable")
+        tickers = universe_tickers(client)
+    elif os.path.isfile(args.tickers):
+        tickers = read_tickers(args.tickers)
+    else:
+        tickers = args.tickers.split(',')
+
+    try:
+        counts = run(
+            tickers, args.output, output_format=output_format, basis=args.basis, workers=args.workers,
+            checkpoint_path=args.checkpoint, flush_rows=args.flush_rows, client=client,
+        )
+    except KeyboardInterrupt:
+        sys.exit("Stopped; rerun the same command to resume")
+    except RuntimeError as e:
+        sys.exit(f"Error: {e}")
+
+    print(' '.join(f'{status}={count}' for status, count in sorted(counts.items())) or "Nothing to do")
+
+
+if __name__ == '__main__':
+    main()
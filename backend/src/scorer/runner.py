@@ -0,0 +1,281 @@
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from src.data.sec_client import SECClient
+from src.pipeline.batch import BATCH_WORKERS, analyze_one, submit_in_context
+from src.pipeline.deadline import Deadline
+from src.pipeline.formats import COLUMNS, arrow_schema, pa, to_row
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+OUTPUT_FORMATS = ('csv', 'parquet')
+
+# Statuses that are final answers; anything else (timeout, error, ...) is retried on the next run
+FINAL_STATUSES = ('ok', 'not_found', 'unsupported')
+
+# Completed results are written (and checkpointed) after this many rows or seconds
+FLUSH_ROWS = 100
+FLUSH_SECONDS = 10.0
+
+
+def universe_tickers(client: SECClient) -> list:
+    """
+    One ticker per company (the first listed share class) from the SEC CIK map
+    """
+    seen = set()
+    tickers = []
+    for ticker, cik, _ in client.companies:
+        if cik not in seen:
+            seen.add(cik)
+            tickers.append(ticker)
+    return tickers
+
+
+def read_tickers(path: str) -> list:
+    """
+    Tickers from a file, one per line (or the first CSV column); # starts a comment
+    """
+    tickers = []
+    with open(path) as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                tickers.append(line.split(',')[0].strip().upper())
+    return tickers
+
+
+class Checkpoint:
+    """
+    Append-only JSONL log of flushed batches: {"tickers": [...], "output": marker}
+
+    A batch is logged only after its rows are safely in the output, so on
+    resume every logged ticker is done and the output can be cut back to the
+    last logged marker, dropping rows written after it.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.done = set()
+        self.markers = []
+        if os.path.exists(path):
+            good_end = 0
+            with open(path, 'rb') as f:
+                for line in f:
+                    try:
+                        # A line without its newline was cut off too
+                        entry = json.loads(line) if line.endswith(b'\n') else None
+                    except ValueError:
+                        entry = None
+                    if entry is None:
+                        break
+                    good_end += len(line)
+                    self.done.update(entry['tickers'])
+                    self.markers.append(entry['output'])
+            if good_end < os.path.getsize(path):
+                # Drop the torn tail from a crash mid-write so new records start on a fresh line
+                with open(path, 'r+b') as f:
+                    f.truncate(good_end)
+        self._file = open(path, 'a')
+
+    def record(self, tickers: list, marker: dict):
+        self._file.write(json.dumps({'tickers': tickers, 'output': marker}) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.done.update(tickers)
+        self.markers.append(marker)
+
+    def close(self):
+        self._file.close()
+
+
+class CsvOutput:
+    """
+    One CSV file appended to in place; its byte offset is the checkpoint marker
+    """
+    def __init__(self, path: str, markers: list):
+        self.path = path
+        offset = markers[-1]['offset'] if markers else 0
+        mode = 'r+' if os.path.exists(path) else 'w'
+        self._file = open(path, mode, newline='')
+        self._file.truncate(offset)
+        self._file.seek(offset)
+        self._writer = csv.DictWriter(self._file, fieldnames=[name for name, _, _, _ in COLUMNS])
+        if offset == 0:
+            self._writer.writeheader()
+
+    def write(self, rows: list) -> dict:
+        self._writer.writerows(rows)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return {'offset': self._file.tell()}
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetOutput:
+    """
+    A directory of Parquet part files, one per flush; the part name is the marker
+    Parts not in the checkpoint (written just before a crash) are removed on resume
+    """
+    def __init__(self, path: str, markers: list):
+        if pq is None:
+            raise RuntimeError("Parquet output requires pyarrow to be installed")
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        kept = set(marker['part'] for marker in markers)
+        for name in os.listdir(path):
+            if name.startswith('part-') and name not in kept:
+                os.remove(os.path.join(path, name))
+        self._next_part = len(kept)
+        self._schema = arrow_schema()
+
+    def write(self, rows: list) -> dict:
+        name = f'part-{self._next_part:05d}.parquet'
+        table = pa.Table.from_pylist(rows, schema=self._schema)
+        temp_path = os.path.join(self.path, name + '.tmp')
+        pq.write_table(table, temp_path)
+        os.replace(temp_path, os.path.join(self.path, name))
+        self._next_part += 1
+        return {'part': name}
+
+    def close(self):
+        pass
+
+
+def _duration(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    return f'{hours}:{rest // 60:02d}:{rest % 60:02d}'
+
+
+class Progress:
+    """
+    Live throughput and ETA for the tickers processed in this run
+    """
+    def __init__(self, total: int, skipped: int, stream=sys.stderr, interval: float = 2.0):
+        self.total = total
+        self.skipped = skipped
+        self.stream = stream
+        self.interval = interval
+        self.counts = {}
+        self.processed = 0
+        self.start = time.monotonic()
+        self._last_print = 0.0
+
+    def update(self, status: str):
+        self.processed += 1
+        self.counts[status] = self.counts.get(status, 0) + 1
+        now = time.monotonic()
+        if now - self._last_print >= self.interval:
+            self._last_print = now
+            self.report()
+
+    def line(self) -> str:
+        elapsed = max(time.monotonic() - self.start, 1e-9)
+        rate = self.processed / elapsed
+        done = self.skipped + self.processed
+        remaining = self.total - done
+        eta = _duration(remaining / rate) if rate > 0 else '?'
+        counts = ' '.join(f'{status}={count}' for status, count in sorted(self.counts.items()))
+        return (f'{done}/{self.total} ({100 * done / max(self.total, 1):.1f}%) '
+                f'{rate:.2f}/s elapsed {_duration(elapsed)} ETA {eta} {counts}')
+
+    def report(self):
+        print(self.line(), file=self.stream, flush=True)
+
+
+def _has_content(path: str) -> bool:
+    if os.path.isdir(path):
+        return bool(os.listdir(path))
+    return os.path.exists(path) and os.path.getsize(path) > 0
+
+
+def run(tickers: list, output_path: str, output_format: str = 'csv', basis: str = 'annual',
+        workers: int = BATCH_WORKERS, checkpoint_path: str = None, flush_rows: int = FLUSH_ROWS,
+        client: SECClient = None, progress_stream=sys.stderr) -> dict:
+    """
+    Score tickers with bounded concurrency, writing results as they complete
+
+    Progress is checkpointed after every flush, so rerunning the same command
+    skips tickers already written. Tickers that fail transiently (timeouts,
+    SEC errors) are not written and are retried on the next run.
+    Returns the status counts for this run.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {output_format}, expected one of {OUTPUT_FORMATS}")
+
+    checkpoint_path = checkpoint_path or output_path + '.checkpoint'
+    if not os.path.exists(checkpoint_path) and _has_content(output_path):
+        raise RuntimeError(f"{output_path} already exists without a checkpoint; remove it or choose another output")
+
+    checkpoint = Checkpoint(checkpoint_path)
+    output_class = ParquetOutput if output_format == 'parquet' else CsvOutput
+    output = output_class(output_path, checkpoint.markers)
+
+    unique = list(dict.fromkeys(ticker.strip().upper() for ticker in tickers if ticker.strip()))
+    pending = [ticker for ticker in unique if ticker not in checkpoint.done]
+    progress = Progress(len(unique), len(unique) - len(pending), stream=progress_stream)
+    if client is None:
+        client = SECClient()
+
+    # Parent of every ticker deadline, cancelled on Ctrl-C to stop in-flight work
+    run_deadline = Deadline()
+    buffered = []
+    last_flush = time.monotonic()
+
+    def flush():
+        nonlocal buffered, last_flush
+        if buffered:
+            marker = output.write([to_row(result) for result in buffered])
+            checkpoint.record([result['ticker'] for result in buffered], marker)
+            buffered = []
+        last_flush = time.monotonic()
+
+    queue = iter(pending)
+    in_flight = set()
+    window = max(1, workers) * 2
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        while True:
+            # Top up to the window only; a full window waits for a finish below
+            while len(in_flight) < window:
+                ticker = next(queue, None)
+                if ticker is None:
+                    break
+                in_flight.add(submit_in_context(pool, analyze_one, ticker, basis, client, run_deadline))
+            if not in_flight:
+                break
+
+            finished, in_flight = wait(in_flight, timeout=FLUSH_SECONDS, return_when=FIRST_COMPLETED)
+            for future in finished:
+                result = future.result()
+                progress.update(result['status'])
+                if result['status'] in FINAL_STATUSES:
+                    buffered.append(result)
+                else:
+                    print(f"Warning: {result['ticker']} {result['status']}, will retry next run: "
+                          f"{result.get('error')}", file=progress_stream)
+
+            if len(buffered) >= flush_rows or time.monotonic() - last_flush >= FLUSH_SECONDS:
+                flush()
+    except KeyboardInterrupt:
+        print("Interrupted, saving completed results...", file=progress_stream)
+        run_deadline.cancel()
+        for future in in_flight:
+            future.cancel()
+        raise
+    finally:
+        pool.shutdown(wait=True)
+        flush()
+        output.close()
+        checkpoint.close()
+        progress.report()
+
+    return dict(progress.counts)
@@ -0,0 +1,143 @@
+import bisect
+import threading
+
+# Below this many other companies a 4-digit SIC industry is too thin to rank
+# against, so the 2-digit SIC major group is used instead
+MIN_PEERS = 5
+
+
+def _peer_groups(sic: str) -> list:
+    """
+    Peer group keys from finest to coarsest for a SIC code
+    """
+    sic = str(sic).strip()
+    groups = [f"sic:{sic}"]
+    if len(sic) >= 2:
+        groups.append(f"major:{sic[:2]}")
+    return groups
+
+
+def _percentile(values: list, value: float, own_value: float = None):
+    """
+    Mid-rank percentile of value among sorted values via binary search
+    own_value is the company's stored value, left out so it isn't its own peer
+    """
+    below = bisect.bisect_left(values, value)
+    equal = bisect.bisect_right(values, value) - below
+    count = len(values)
+    if own_value is not None:
+        if own_value < value:
+            below -= 1
+        elif own_value == value:
+            equal -= 1
+        count -= 1
+    if count <= 0:
+        return None
+    return round(100 * (below + 0.5 * equal) / count, 1)
+
+
+class PeerDistributions:
+    """
+    Sorted per-industry distributions of the composite score and each component
+
+    Kept up to date incrementally as companies are (re)scored, so a percentile
+    lookup is a binary search instead of rebuilding the peer set per request.
+    Scores are distress scores (lower is better): a percentile of 10 means
+    only 10% of peers have a healthier score.
+    """
+    def __init__(self, min_peers: int = MIN_PEERS):
+        self.min_peers = min_peers
+        self._distributions = {}
+        self._members = {}
+        self._lock = threading.Lock()
+
+    def update(self, cik: str, sic: str, values: dict):
+        """
+        Insert or replace a company's values ({'score': x, 'ohlson': y, ...})
+        """
+        with self._lock:
+            self._remove(cik)
+            if not sic:
+                return
+            groups = _peer_groups(sic)
+            for group in groups:
+                for metric, value in values.items():
+                    if value is None:
+                        continue
+                    bisect.insort(self._distributions.setdefault((group, metric), []), value)
+            self._members[cik] = (groups, dict(values))
+
+    def load(self, members: list):
+        """
+        Bulk insert [(cik, sic, values)], sorting each distribution once
+        """
+        with self._lock:
+            touched = set()
+            for cik, sic, values in members:
+                self._remove(cik)
+                if not sic:
+                    continue
+                groups = _peer_groups(sic)
+                for group in groups:
+                    for metric, value in values.items():
+                        if value is None:
+                            continue
+                        self._distributions.setdefault((group, metric), []).append(value)
+                        touched.add((group, metric))
+                self._members[cik] = (groups, dict(values))
+            for key in touched:
+                self._distributions[key].sort()
+
+    def remove(self, cik: str):
+        with self._lock:
+            self._remove(cik)
+
+    def _remove(self, cik: str):
+        member = self._members.pop(cik, None)
+        if member is None:
+            return
+        groups, values = member
+        for group in groups:
+            for metric, value in values.items():
+                if value is None:
+                    continue
+                distribution = self._distributions[(group, metric)]
+                del distribution[bisect.bisect_left(distribution, value)]
+
+    def percentiles(self, cik: str, sic: str, values: dict) -> dict:
+        """
+        Percentile of each value within the finest peer group with enough peers
+
+        Returns None when the company has no SIC code or no group has peers
+        """
+        if not sic:
+            return None
+
+        with self._lock:
+            member = self._members.get(cik)
+            chosen = None
+            for group in _peer_groups(sic):
+                # Peer count excludes the company itself when it is in the group
+                size = len(self._distributions.get((group, 'score'), []))
+                if member is not None and group in member[0]:
+                    size -= 1
+                if size >= self.min_peers or (chosen is None and size > 0):
+                    chosen = (group, size)
+                    if size >= self.min_peers:
+                        break
+
+            if chosen is None:
+                return None
+
+            group, size = chosen
+            own_values = member[1] if member is not None and group in member[0] else {}
+            result = {}
+            for metric, value in values.items():
+                distribution = self._distributions.get((group, metric), [])
+                result[metric] = None if value is None else _percentile(distribution, value, own_values.get(metric))
+
+        return {
+            'peer_group': group,
+            'peer_count': size,
+            'percentiles': result,
+        }
@@ -0,0 +1,113 @@
+import threading
+import time
+
+from src.scoring.peers import PeerDistributions
+
+# Per-request response fields that are never stored, snapshotted or pushed
+REQUEST_ONLY_FIELDS = ('profile',)
+
+
+def _peer_values(result: dict) -> dict:
+    """
+    The composite score plus each normalized component score
+    """
+    values = {'score': result.get('score')}
+    for name, component in (result.get('components') or {}).items():
+        values[name] = component.get('score')
+    return values
+
+
+class ScoreStore:
+    """
+    Latest analysis result per CIK, with industry peer distributions kept in sync
+
+    Listeners registered with add_listener(fn) are called as fn(previous, current)
+    after every put, outside the store lock.
+
+    After attach_snapshot(snapshot), results not scored since the snapshot
+    are read from the memory-mapped snapshot file on demand.
+    """
+    def __init__(self, peers: PeerDistributions = None):
+        self.peers = peers or PeerDistributions()
+        self._results = {}
+        self._snapshot = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        # Bumped on every change, so snapshot writers can skip unchanged stores
+        self.revision = 0
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def attach_snapshot(self, snapshot):
+        """
+        Serve results from a snapshot until they are re-scored
+        Only the peer values are loaded into memory
+        """
+        self.peers.load(snapshot.peer_members())
+        with self._lock:
+            self._snapshot = snapshot
+            self.revision += 1
+
+    def get(self, cik: str) -> dict:
+        with self._lock:
+            result = self._results.get(cik)
+            snapshot = self._snapshot
+        if result is None and snapshot is not None:
+            result = snapshot.results.get(cik)
+        return result
+
+    def __len__(self) -> int:
+        with self._lock:
+            if self._snapshot is None:
+                return len(self._results)
+            return len(self._results) + sum(
+                1 for cik in self._snapshot.results.keys() if cik not in self._results
+            )
+
+    def items(self) -> list:
+        with self._lock:
+            items = list(self._results.items())
+            snapshot = self._snapshot
+            scored = set(self._results)
+        if snapshot is not None:
+            items.extend((cik, result) for cik, result in snapshot.results.items() if cik not in scored)
+        return items
+
+    def peer_members(self, results: list) -> list:
+        """
+        [cik, sic, peer values] for each result, as stored in snapshots
+        """
+        return [[result['cik'], result.get('sic'), _peer_values(result)] for result in results]
+
+    def put(self, result: dict) -> dict:
+        """
+        Store an analysis result and update its industry distributions
+        Returns a copy of the stored result, safe for the caller to extend
+        """
+        cik = result['cik']
+        result = {key: value for key, value in result.items() if key not in REQUEST_ONLY_FIELDS}
+        result.setdefault('scored_at', time.time())
+
+        with self._lock:
+            previous = self._results.get(cik)
+            if previous is None and self._snapshot is not None:
+                previous = self._snapshot.results.get(cik)
+            self._results[cik] = result
+            self.revision += 1
+            # Under the store lock so concurrent puts reach the distributions in store order
+            self.peers.update(cik, result.get('sic'), _peer_values(result))
+
+        for listener in self._listeners:
+            try:
+                listener(previous, result)
+            except Exception as e:
+                print(f"Warning: Score listener failed for {cik}: {e}")
+
+        return dict(result)
+
+    def peer_percentiles(self, result: dict) -> dict:
+        """
+        Percentiles of a stored result's score and components within its industry
+        """
+        return self.peers.percentiles(result['cik'], result.get('sic'), _peer_values(result))
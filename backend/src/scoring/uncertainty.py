@@ -0,0 +1,124 @@
+"""
+Monte Carlo confidence bands for the composite score and O-Score
+
+Inputs the parser could not take straight from their primary XBRL tag are
+perturbed, and every sample is scored in one pass of the vectorized
+composite. Fallback tags and derived totals get log-normal noise around the
+reported value; inputs that defaulted to 0 are drawn from a plausible range
+instead.
+"""
+import os
+import zlib
+
+import numpy as np
+
+from src.scoring import vectorized
+
+UNCERTAINTY_SAMPLES = int(os.getenv('UNCERTAINTY_SAMPLES', '2000'))
+
+# Two-sided interval reported for the score and O-Score
+CONFIDENCE = 0.90
+
+# Relative (log-normal sigma) error by provenance
+RELATIVE_NOISE = {
+    'primary': 0.0,
+    # A later alt tag may be a narrower or broader concept than the first choice
+    'fallback': 0.10,
+    # Rebuilt totals (e.g. current + noncurrent liabilities) may miss components
+    'derived': 0.25,
+}
+
+# Defaulted input -> (reported field it scales with, low share, high share)
+DEFAULT_RANGES = {
+    'inventory': ('current_assets', 0.0, 0.30),
+    'capital_expenditure': ('total_assets', 0.0, 0.06),
+}
+
+# Provenance key -> facts fields it covers (both years come from the same tag)
+_FIELDS_BY_KEY = {
+    'revenue': ('revenue_current', 'revenue_last'),
+    'net_income': ('net_income_current', 'net_income_last'),
+}
+
+# Every facts field the composite reads
+FACT_FIELDS = (
+    'total_assets', 'current_assets', 'current_liabilities', 'total_liabilities',
+    'stockholders_equity', 'inventory', 'capital_expenditure',
+    'cost_of_goods_sold', 'operating_income', 'operating_expenses', 'interest_expense',
+    'revenue_current', 'revenue_last', 'net_income_current', 'net_income_last',
+    'operating_cash_flow', 'depreciation',
+)
+
+
+def _as_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _interval(values) -> list:
+    tail = (1 - CONFIDENCE) / 2 * 100
+    low, high = np.percentile(values, [tail, 100 - tail])
+    return [round(float(low), 2), round(float(high), 2)]
+
+
+def seed_for(key: str) -> int:
+    """
+    Stable seed so repeated analyses of a company give the same bands
+    """
+    return zlib.crc32(str(key).encode('utf-8'))
+
+
+def score_bands(facts: dict, provenance: dict, samples: int = UNCERTAINTY_SAMPLES, seed: int = None) -> dict:
+    """
+    Confidence interval of the score and O-Score plus the probability of each grade
+
+    provenance maps fields to 'primary', 'fallback', 'derived' or 'default';
+    fields without an entry are taken as exact. Returns None if no sample
+    could be scored.
+    """
+    rng = np.random.default_rng(seed)
+    arrays = {field: np.full(samples, _as_float(facts.get(field))) for field in FACT_FIELDS}
+
+    uncertain = {}
+    for key, source in sorted(provenance.items()):
+        sigma = RELATIVE_NOISE.get(source)
+        if not sigma:
+            continue
+        fields = [field for field in _FIELDS_BY_KEY.get(key, (key,)) if field in arrays]
+        if not fields:
+            continue
+        noise = np.exp(rng.normal(0.0, sigma, samples))
+        for field in fields:
+            arrays[field] = arrays[field] * noise
+        uncertain[key] = source
+
+    for field, (base, low, high) in DEFAULT_RANGES.items():
+        if provenance.get(field) == 'default':
+            arrays[field] = rng.uniform(low, high, samples) * np.abs(arrays[base])
+            uncertain[field] = 'default'
+
+    composite = vectorized.calculate_composite(arrays)
+    score = composite['score']
+    valid = ~np.isnan(score)
+    if not valid.any():
+        return None
+
+    ohlson = composite['ohlson'][valid]
+    ohlson = ohlson[~np.isnan(ohlson)]
+    grades = composite['grade'][valid]
+    valid_count = int(valid.sum())
+
+    return {
+        'samples': valid_count,
+        'confidence': CONFIDENCE,
+        'score_median': round(float(np.median(score[valid])), 2),
+        'score_interval': _interval(score[valid]),
+        'ohlson_interval': _interval(ohlson) if len(ohlson) else None,
+        'grade_probabilities': {
+            str(grade): round(float(np.count_nonzero(grades == grade)) / valid_count, 3)
+            for grade in vectorized.GRADES
+        },
+        'uncertain_inputs': uncertain,
+    }
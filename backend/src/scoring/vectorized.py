@@ -0,0 +1,249 @@
+"""
+NumPy versions of the ratio, O-Score, normalization and composite functions
+
+Each function mirrors its scalar counterpart branch for branch, operating on
+arrays of company-years at once. Inputs that the scalar code would reject
+(missing values, division by zero, log of a non-positive number) come out
+as NaN instead of raising, so one bad row never stops a whole pass.
+"""
+import numpy as np
+
+# Same weights as calculate_composite, in component order
+COMPONENT_WEIGHTS = {
+    'ohlson': 0.10,
+    'revenue_growth': 0.15,
+    'net_income_growth': 0.15,
+    'operating_cf': 0.12,
+    'free_cf': 0.08,
+    'current_ratio': 0.08,
+    'quick_ratio': 0.07,
+    'debt_to_equity': 0.08,
+    'interest_coverage': 0.07,
+    'roa': 0.05,
+    'net_margin': 0.05,
+}
+
+# Upper score bound of grades A-E (interpret_score); anything above is F
+GRADE_BOUNDS = np.array([20.0, 35.0, 50.0, 65.0, 80.0])
+GRADES = np.array(['A', 'B', 'C', 'D', 'E', 'F'])
+
+
+def _divide(numerator, denominator):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = np.true_divide(numerator, denominator)
+    return np.where(np.isfinite(result), result, np.nan)
+
+
+def _filled(values, default: float = 0.0):
+    return np.where(np.isnan(values), default, values)
+
+
+def _truthy(values):
+    return ~np.isnan(values) & (values != 0)
+
+
+def get_liquidity_ratios(facts: dict) -> dict:
+    return {
+        'current_ratio': _divide(facts['current_assets'], facts['current_liabilities']),
+        'quick_ratio': _divide(facts['current_assets'] - facts['inventory'], facts['current_liabilities']),
+    }
+
+
+def get_leverage_ratios(facts: dict) -> dict:
+    interest = facts['interest_expense']
+    operating_income = facts['operating_income']
+
+    # Fallback EBIT when operating income is missing: revenue - COGS - opex
+    revenue = _filled(facts['revenue_current'])
+    fallback_income = revenue - _filled(facts['cost_of_goods_sold']) - _filled(facts['operating_expenses'])
+
+    has_interest = _truthy(interest)
+    interest_coverage = np.where(
+        has_interest & _truthy(operating_income),
+        _divide(operating_income, interest),
+        np.where(has_interest & (revenue != 0), _divide(fallback_income, interest), 0.0),
+    )
+
+    return {
+        'debt_to_equity': _divide(facts['total_liabilities'], facts['stockholders_equity']),
+        'interest_coverage_ratio': interest_coverage,
+    }
+
+
+def get_profitability_ratios(facts: dict) -> dict:
+    return {
+        'ROA': _divide(facts['net_income_current'], facts['total_assets']) * 100,
+        'net_profit_margin': _divide(facts['net_income_current'], facts['revenue_current']),
+    }
+
+
+def get_cash_flow_ratios(facts: dict) -> dict:
+    return {
+        'operating_cash_flow': _divide(facts['operating_cash_flow'], facts['current_liabilities']),
+        'free_cash_flow_to_assets': _divide(
+            facts['operating_cash_flow'] - facts['capital_expenditure'], facts['total_assets']
+        ),
+    }
+
+
+def _pct_change(current, last):
+    has_last = _truthy(last)
+    return np.where(has_last, _divide(current - last, np.abs(last)) * 100, 0.0)
+
+
+def get_revenue_pct_change(facts: dict):
+    return _pct_change(facts['revenue_current'], facts['revenue_last'])
+
+
+def get_net_income_pct_change(facts: dict):
+    return _pct_change(facts['net_income_current'], facts['net_income_last'])
+
+
+def get_ohlson_oscore(facts: dict):
+    ta = facts['total_assets']
+    tl = facts['total_liabilities']
+    ca = facts['current_assets']
+    cl = facts['current_liabilities']
+    nic = facts['net_income_current']
+    nil = facts['net_income_last']
+
+    wc = ca - cl
+    ffo = nic + facts['depreciation']
+    intwo = ((nic < 0) & (nil < 0)).astype(float)
+    oeneg = (tl > ta).astype(float)
+    swing = np.abs(nic) + np.abs(nil)
+    chin = np.where(swing == 0, 0.0, _divide(nic - nil, swing))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_size = np.where(ta > 0, np.log(np.where(ta > 0, ta, 1.0) / 1000), np.nan)
+
+    o_score = (
+        -1.32 - 0.407 * log_size + 6.03 * _divide(tl, ta) - 1.43 * _divide(wc, ta)
+        + 0.0757 * _divide(cl, ca) - 2.37 * _divide(nic, ta) - 1.83 * _divide(ffo, tl)
+        + 0.285 * intwo - 1.72 * oeneg - 0.521 * chin
+    )
+    # NaN inputs must not be masked by the indicator terms
+    return np.where(np.isnan(nil) | np.isnan(nic), np.nan, o_score)
+
+
+def normalize_ohlson(o_score):
+    return np.select(
+        [o_score < -2, o_score <= 0.5],
+        [np.maximum(0, 10 + (o_score + 2) * 5), 10 + (o_score + 2) * 16],
+        np.minimum(100, 50 + (o_score - 0.5) * 25),
+    )
+
+
+def normalize_growth(pct_change):
+    return np.select(
+        [pct_change < -20, pct_change < -10, pct_change < 0, pct_change <= 5, pct_change <= 15],
+        [
+            np.minimum(100, 80 + np.abs(pct_change + 20)),
+            65 + np.abs(pct_change + 10) * 1.5,
+            40 + np.abs(pct_change) * 2.5,
+            20 + (5 - pct_change) * 4,
+            5 + (15 - pct_change),
+        ],
+        np.maximum(0, 5 - (pct_change - 15) * 0.33),
+    )
+
+
+def normalize_liquidity(ratio, ideal: float = 2.0, has_strong_cf=False):
+    base_score = 70 + (1 - ratio) * 30
+    low = np.where(has_strong_cf, base_score * 0.6, base_score)
+    return np.select(
+        [ratio < 1, ratio <= ideal, ratio <= 3],
+        [low, 30 + (ideal - ratio) * 40, 30 + (ratio - ideal) * 20],
+        np.minimum(60, 50 + (ratio - 3) * 10),
+    )
+
+
+def normalize_leverage(debt_to_equity):
+    d = debt_to_equity
+    return np.select(
+        [d < 0.5, d <= 1.5, d <= 3, d <= 5],
+        [d * 40, 20 + (d - 0.5) * 20, 40 + (d - 1.5) * 13.33, 60 + (d - 3) * 10],
+        np.minimum(100, 80 + (d - 5) * 4),
+    )
+
+
+def normalize_interest_coverage(ratio):
+    return np.select(
+        [(ratio < 0) | (ratio > 50), ratio < 1, ratio <= 2.5, ratio <= 5, ratio <= 10],
+        [0.0, 80 + (1 - ratio) * 20, 60 + (2.5 - ratio) * 13.33, 40 + (5 - ratio) * 8, 20 + (10 - ratio) * 4],
+        np.maximum(0, 20 - (ratio - 10) * 2),
+    )
+
+
+def normalize_profitability(roa):
+    return np.select(
+        [roa < 0, roa <= 5, roa <= 10, roa <= 20],
+        [np.minimum(100, 80 + np.abs(roa) * 2), 60 + (5 - roa) * 4, 40 + (10 - roa) * 4, 20 + (20 - roa) * 2],
+        np.maximum(0, 20 - (roa - 20) * 0.5),
+    )
+
+
+def normalize_cash_flow(ratio, threshold: float = 0.5):
+    return np.select(
+        [ratio < 0, ratio <= threshold, ratio <= 1],
+        [
+            np.minimum(100, 80 + np.abs(ratio) * 20),
+            60 + (threshold - ratio) / threshold * 40,
+            30 + (1 - ratio) / (1 - threshold) * 30,
+        ],
+        np.maximum(0, 30 - (ratio - 1) * 15),
+    )
+
+
+def calculate_composite(facts: dict) -> dict:
+    """
+    Vectorized calculate_composite over dict of equal-length float arrays
+
+    Returns dict with score, grade and ohlson (raw O-Score) arrays plus
+    components (name -> normalized score array); rows that cannot be
+    scored have NaN score and an empty grade
+    """
+    cf_ratios = get_cash_flow_ratios(facts)
+    leverage_ratios = get_leverage_ratios(facts)
+    liquidity_ratios = get_liquidity_ratios(facts)
+    profitability_ratios = get_profitability_ratios(facts)
+
+    ohlson_score = get_ohlson_oscore(facts)
+    has_strong_cf = cf_ratios['operating_cash_flow'] > 0.4
+
+    components = {
+        'ohlson': normalize_ohlson(ohlson_score),
+        'revenue_growth': normalize_growth(get_revenue_pct_change(facts)),
+        'net_income_growth': normalize_growth(get_net_income_pct_change(facts)),
+        'operating_cf': normalize_cash_flow(cf_ratios['operating_cash_flow'], threshold=0.15),
+        'free_cf': normalize_cash_flow(cf_ratios['free_cash_flow_to_assets'], threshold=0.05),
+        'current_ratio': normalize_liquidity(liquidity_ratios['current_ratio'], ideal=2.0, has_strong_cf=has_strong_cf),
+        'quick_ratio': normalize_liquidity(liquidity_ratios['quick_ratio'], ideal=1.5, has_strong_cf=has_strong_cf),
+        'debt_to_equity': normalize_leverage(leverage_ratios['debt_to_equity']),
+        'interest_coverage': normalize_interest_coverage(leverage_ratios['interest_coverage_ratio']),
+        'roa': normalize_profitability(profitability_ratios['ROA']),
+        'net_margin': normalize_profitability(profitability_ratios['net_profit_margin'] * 100),
+    }
+
+    composite = sum(components[name] * weight for name, weight in COMPONENT_WEIGHTS.items())
+
+    return {
+        'score': np.round(composite, 2),
+        # Graded before rounding, as interpret_score is, so boundary scores agree with /analyze
+        'grade': grade_of(composite),
+        'ohlson': ohlson_score,
+        'components': components,
+    }
+
+
+def grade_index(score):
+    """
+    0 (A) .. 5 (F) per interpret_score thresholds, -1 where score is NaN
+    """
+    index = np.searchsorted(GRADE_BOUNDS, score, side='left')
+    return np.where(np.isnan(score), -1, index)
+
+
+def grade_of(score):
+    index = grade_index(score)
+    return np.where(index >= 0, GRADES[np.clip(index, 0, len(GRADES) - 1)], '')
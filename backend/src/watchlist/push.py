@@ -0,0 +1,102 @@
+import asyncio
+import json
+import os
+import threading
+
+# Longest a subscription stays silent before a keep-alive comment is sent
+SSE_KEEPALIVE_SECONDS = float(os.getenv('SSE_KEEPALIVE_SECONDS', '15'))
+
+# Most tickers one subscription may watch
+SSE_MAX_TICKERS = int(os.getenv('SSE_MAX_TICKERS', '100'))
+
+
+def _changed(previous: dict, current: dict) -> bool:
+    if previous is None:
+        return True
+    return previous.get('score') != current.get('score') or previous.get('grade') != current.get('grade')
+
+
+def format_sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+class Subscription:
+    """
+    One connected client's CIK set and its undelivered updates
+
+    Updates are coalesced per CIK (only the latest is kept), so a slow
+    client holds at most one pending message per company it watches.
+    Must be created on the event loop that will read it.
+    """
+    def __init__(self, ciks):
+        self.ciks = frozenset(ciks)
+        self.loop = asyncio.get_running_loop()
+        self._pending = {}
+        self._ready = asyncio.Event()
+
+    def deliver(self, cik: str, message: str):
+        """
+        Queue a message (event loop thread only; see ScoreBroadcaster)
+        """
+        self._pending[cik] = message
+        self._ready.set()
+
+    async def next_messages(self, timeout: float = None) -> list:
+        """
+        Pending messages, waiting up to timeout for one; [] on timeout
+        """
+        if not self._pending:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        self._ready.clear()
+        messages = list(self._pending.values())
+        self._pending = {}
+        return messages
+
+
+class ScoreBroadcaster:
+    """
+    Pushes changed scores from a ScoreStore to subscribed clients
+
+    Register on_score with ScoreStore.add_listener. Each change is rendered
+    once with render(result) -> dict, however many clients watch the
+    company, and handed to each subscriber's event loop with
+    call_soon_threadsafe, since puts happen on worker threads.
+    """
+    def __init__(self, render):
+        self.render = render
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, ciks) -> Subscription:
+        subscription = Subscription(ciks)
+        with self._lock:
+            for cik in subscription.ciks:
+                self._subscribers.setdefault(cik, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            for cik in subscription.ciks:
+                subscribers = self._subscribers.get(cik)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[cik]
+
+    def on_score(self, previous: dict, current: dict):
+        cik = current['cik']
+        with self._lock:
+            subscribers = list(self._subscribers.get(cik, ()))
+        if not subscribers or not _changed(previous, current):
+            return
+
+        message = format_sse('score', json.dumps(self.render(current)))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, cik, message)
+            except RuntimeError:
+                # Its event loop has shut down
+                self.unsubscribe(subscription)
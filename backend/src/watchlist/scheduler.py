@@ -0,0 +1,336 @@
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+
+from src.pipeline.analyzer import analyze, TickerNotFoundError, UnsupportedFilerError
+
+DAY = 24 * 60 * 60
+
+# Re-check cadence for each alert_level from get_recommendation
+ALERT_INTERVALS = {
+    'Quarterly': 90 * DAY,
+    'Monthly': 30 * DAY,
+    'Weekly': 7 * DAY,
+    'Daily': DAY,
+    'Constant': float(os.getenv('WATCHLIST_CONSTANT_INTERVAL', str(60 * 60))),
+}
+
+# Retry delay after a transient failure (SEC outage, timeout, ...)
+RETRY_SECONDS = 60 * 60
+
+# SEC requests per evaluation: companyfacts + submissions
+REQUESTS_PER_EVALUATION = 2
+
+# SEC requests per minute the watchlist may spend, leaving room for interactive use
+WATCHLIST_SEC_BUDGET = float(os.getenv('WATCHLIST_SEC_BUDGET', '120'))
+
+# Upper bound on how long the background loop sleeps between checks
+MAX_SLEEP_SECONDS = 60
+
+MAX_EVENTS = 1000
+
+
+class _RequestBudget:
+    """
+    Token bucket of SEC requests per minute
+    """
+    def __init__(self, per_minute: float, clock):
+        self.rate = per_minute / 60.0
+        self.capacity = max(per_minute, REQUESTS_PER_EVALUATION)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_spend(self, cost: float) -> bool:
+        self._refill()
+        if self.tokens < cost:
+            return False
+        self.tokens -= cost
+        return True
+
+    def seconds_until(self, cost: float) -> float:
+        self._refill()
+        if self.tokens >= cost or self.rate <= 0:
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class WatchlistScheduler:
+    """
+    Re-evaluates watched companies at the cadence their alert level calls for
+
+    Due re-checks live in a heap ordered by due time, so each wake-up only
+    touches what is actually due; thousands of Quarterly names cost nothing
+    between checks. Evaluations are capped by an SEC request budget, and a
+    grade_change event is emitted whenever a re-check moves the grade.
+
+    Tickers are watched explicitly with add() or held by stream subscribers
+    with hold()/release(); a held ticker is dropped when its last holder
+    releases it, unless it was also added explicitly.
+    """
+    def __init__(self, evaluate=analyze, store=None, budget_per_minute: float = WATCHLIST_SEC_BUDGET, clock=time.time):
+        self.evaluate = evaluate
+        self.store = store
+        self.clock = clock
+        self.budget = _RequestBudget(budget_per_minute, clock)
+        self.events = deque(maxlen=MAX_EVENTS)
+        self._listeners = []
+        self._entries = {}
+        # Explicitly watched tickers, and ticker -> number of stream holds
+        self._watched = set()
+        self._holds = {}
+        self._heap = []
+        self._sequence = itertools.count()
+        self._event_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener):
+        """
+        Call listener(event) for every emitted event
+        """
+        self._listeners.append(listener)
+
+    def _schedule(self, entry: dict, due: float):
+        # Older heap items for this ticker become stale and are skipped on pop
+        entry['seq'] = next(self._sequence)
+        entry['next_check'] = due
+        heapq.heappush(self._heap, (due, entry['seq'], entry['ticker']))
+
+    def _entry(self, ticker: str, stored: dict = None) -> dict:
+        # Caller holds the lock
+        entry = self._entries.get(ticker)
+        if entry is None:
+            entry = {
+                'ticker': ticker,
+                'cik': None,
+                'score': None,
+                'grade': None,
+                'alert_level': None,
+                'last_checked': None,
+                'next_check': None,
+                'error': None,
+            }
+            self._entries[ticker] = entry
+            due = self.clock()
+            if stored is not None and stored.get('scored_at') is not None:
+                # A stored score is as good as a check made when it was scored
+                entry.update({
+                    'cik': stored['cik'],
+                    'score': stored.get('score'),
+                    'grade': stored.get('grade'),
+                    'alert_level': stored.get('alert_level'),
+                    'last_checked': stored['scored_at'],
+                })
+                interval = ALERT_INTERVALS.get(stored.get('alert_level'), ALERT_INTERVALS['Quarterly'])
+                due = stored['scored_at'] + interval
+            self._schedule(entry, due)
+        return entry
+
+    def add(self, ticker: str) -> dict:
+        """
+        Watch a ticker; it is evaluated on the next run
+        """
+        ticker = ticker.upper()
+        with self._lock:
+            self._watched.add(ticker)
+            return _public(self._entry(ticker))
+
+    def remove(self, ticker: str) -> bool:
+        """
+        Stop watching a ticker; it stays scheduled while streams still hold it
+        """
+        ticker = ticker.upper()
+        with self._lock:
+            self._watched.discard(ticker)
+            if ticker in self._holds:
+                return ticker in self._entries
+            return self._entries.pop(ticker, None) is not None
+
+    def hold(self, ticker: str, cik: str = None) -> dict:
+        """
+        Watch a ticker for a stream subscriber until the matching release()
+
+        With the ticker's cik, a new entry starts from the store's score and
+        is next due at its alert-level cadence, so reopening a stream does not
+        re-download a company that was scored recently.
+        """
+        ticker = ticker.upper()
+        stored = self.store.get(cik) if self.store is not None and cik is not None else None
+        with self._lock:
+            self._holds[ticker] = self._holds.get(ticker, 0) + 1
+            return _public(self._entry(ticker, stored))
+
+    def release(self, ticker: str):
+        ticker = ticker.upper()
+        with self._lock:
+            count = self._holds.get(ticker, 0) - 1
+            if count > 0:
+                self._holds[ticker] = count
+                return
+            self._holds.pop(ticker, None)
+            if ticker not in self._watched:
+                self._entries.pop(ticker, None)
+
+    def _drop(self, ticker: str):
+        """
+        Unwatch a ticker that cannot be scored, whoever watches or holds it
+        """
+        with self._lock:
+            self._watched.discard(ticker)
+            self._entries.pop(ticker, None)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker.upper() in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def list(self) -> list:
+        with self._lock:
+            return sorted((_public(e) for e in self._entries.values()), key=lambda e: e['next_check'] or 0)
+
+    def next_due(self) -> float:
+        """
+        Due time of the earliest live entry, or None if nothing is watched
+        """
+        with self._lock:
+            while self._heap:
+                due, seq, ticker = self._heap[0]
+                entry = self._entries.get(ticker)
+                if entry is not None and entry['seq'] == seq:
+                    return due
+                heapq.heappop(self._heap)
+        return None
+
+    def seconds_until_runnable(self) -> float:
+        """
+        How long the background loop can sleep before something is due and affordable
+        """
+        due = self.next_due()
+        if due is None:
+            return MAX_SLEEP_SECONDS
+        wait = max(due - self.clock(), self.budget.seconds_until(REQUESTS_PER_EVALUATION))
+        return min(max(wait, 0.0), MAX_SLEEP_SECONDS)
+
+    def _pop_due(self, now: float) -> dict:
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due, seq, ticker = self._heap[0]
+                entry = self._entries.get(ticker)
+                if entry is None or entry['seq'] != seq:
+                    heapq.heappop(self._heap)
+                    continue
+                if not self.budget.try_spend(REQUESTS_PER_EVALUATION):
+                    return None
+                heapq.heappop(self._heap)
+                return entry
+        return None
+
+    def run_due(self, now: float = None) -> list:
+        """
+        Evaluate every due entry the request budget allows, returns emitted events
+        """
+        now = self.clock() if now is None else now
+        emitted = []
+
+        while True:
+            entry = self._pop_due(now)
+            if entry is None:
+                break
+            event = self._evaluate(entry)
+            if event is not None:
+                emitted.append(event)
+
+        return emitted
+
+    def _evaluate(self, entry: dict) -> dict:
+        ticker = entry['ticker']
+        try:
+            result = self.evaluate(ticker)
+        except (TickerNotFoundError, UnsupportedFilerError) as e:
+            self._drop(ticker)
+            return self._emit({'type': 'unwatched', 'ticker': ticker, 'reason': str(e)})
+        except Exception as e:
+            with self._lock:
+                entry['error'] = str(e)
+                entry['last_checked'] = self.clock()
+                if self._entries.get(ticker) is entry:
+                    self._schedule(entry, self.clock() + RETRY_SECONDS)
+            return None
+
+        if self.store is not None:
+            self.store.put(result)
+
+        with self._lock:
+            previous_grade, previous_score = entry['grade'], entry['score']
+            entry.update({
+                'cik': result['cik'],
+                'score': result['score'],
+                'grade': result['grade'],
+                'alert_level': result['alert_level'],
+                'last_checked': self.clock(),
+                'error': None,
+            })
+            if self._entries.get(ticker) is entry:
+                interval = ALERT_INTERVALS.get(result['alert_level'], ALERT_INTERVALS['Quarterly'])
+                self._schedule(entry, self.clock() + interval)
+
+        if previous_grade is None or previous_grade == result['grade']:
+            return None
+
+        return self._emit({
+            'type': 'grade_change',
+            'ticker': ticker,
+            'cik': result['cik'],
+            'previous_grade': previous_grade,
+            'grade': result['grade'],
+            'previous_score': previous_score,
+            'score': result['score'],
+            'alert_level': result['alert_level'],
+        })
+
+    def _emit(self, event: dict) -> dict:
+        event['id'] = next(self._event_ids)
+        event['at'] = self.clock()
+        self.events.append(event)
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"Warning: Watchlist listener failed: {e}")
+        return event
+
+    def events_since(self, event_id: int = 0) -> list:
+        return [e for e in list(self.events) if e['id'] > event_id]
+
+
+def _public(entry: dict) -> dict:
+    return {k: v for k, v in entry.items() if k != 'seq'}
+
+
+async def run_scheduler(scheduler: WatchlistScheduler, wakeup: asyncio.Event):
+    """
+    Background loop: sleep until the next due re-check (or a wakeup), then run it
+    Evaluations run in a worker thread so the event loop stays responsive
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout=scheduler.seconds_until_runnable())
+        except asyncio.TimeoutError:
+            pass
+        wakeup.clear()
+
+        try:
+            await loop.run_in_executor(None, scheduler.run_due)
+        except Exception as e:
+            print(f"Warning: Watchlist run failed: {e}")
@@ -0,0 +1,125 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.data import sec_client
+from src.data.frames import FramesIngestor
+from src.data.sec_client import SECClient
+
+TICKERS = {
+    "0": {"cik_str": 320193, "ticker": "AAA", "title": "Alpha Corp"},
+    "1": {"cik_str": 789019, "ticker": "BBB", "title": "Beta Inc"},
+}
+
+
+def _frame(tag, period, rows):
+    return {
+        "taxonomy": "us-gaap", "tag": tag, "ccp": period, "uom": "USD",
+        "data": [{"cik": cik, "entityName": name, "val": val} for cik, name, val in rows],
+    }
+
+
+# Every other frame URL answers 404, as EDGAR does for tags nobody filed
+FRAMES = {
+    ("Assets", "CY2023Q4I"): _frame("Assets", "CY2023Q4I", [(320193, "Alpha Corp", 1000), (789019, "Beta Inc", 500)]),
+    ("AssetsCurrent", "CY2023Q4I"): _frame("AssetsCurrent", "CY2023Q4I", [(320193, "Alpha Corp", 400)]),
+    ("CurrentAssets", "CY2023Q4I"): _frame("CurrentAssets", "CY2023Q4I", [(320193, "Alpha Corp", 1), (789019, "Beta Inc", 200)]),
+    ("LiabilitiesCurrent", "CY2023Q4I"): _frame("LiabilitiesCurrent", "CY2023Q4I", [(320193, "Alpha Corp", 100), (789019, "Beta Inc", 150)]),
+    ("Liabilities", "CY2023Q4I"): _frame("Liabilities", "CY2023Q4I", [(320193, "Alpha Corp", 300)]),
+    ("LongTermDebt", "CY2023Q4I"): _frame("LongTermDebt", "CY2023Q4I", [(789019, "Beta Inc", 50)]),
+    ("Revenues", "CY2023"): _frame("Revenues", "CY2023", [(320193, "Alpha Corp", 900), (789019, "Beta Inc", 100)]),
+    ("Revenues", "CY2022"): _frame("Revenues", "CY2022", [(320193, "Alpha Corp", 800)]),
+    # A later alt tag with only a prior-year value must not pair with Revenues
+    ("SalesRevenueNet", "CY2022"): _frame("SalesRevenueNet", "CY2022", [(320193, "Alpha Corp", 1), (789019, "Beta Inc", 80)]),
+}
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        body = None
+        if self.path == "/files/company_tickers.json":
+            body = TICKERS
+        elif self.path.startswith("/api/xbrl/frames/us-gaap/"):
+            tag, unit, period = self.path[len("/api/xbrl/frames/us-gaap/"):-len(".json")].split("/")
+            body = FRAMES.get((tag, period))
+
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def sec_server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FixtureHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(sec_client, "SEC_DATA_URL", url)
+    monkeypatch.setattr(sec_client, "SEC_WWW_URL", url)
+    monkeypatch.setattr(sec_client, "_rate_limiter", sec_client._RateLimiter(1000))
+    monkeypatch.setattr(sec_client, "_cik_map_cache", {"mapping": None, "companies": [], "loaded_at": 0.0})
+    monkeypatch.setattr(sec_client, "_archive_cik_maps", {})
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_get_frame_returns_none_for_404(sec_server):
+    client = SECClient(mode="live")
+    assert client.get_frame("Assets", "CY2023Q4I")["data"][0]["val"] == 1000
+    assert client.get_frame("NotATag", "CY2023Q4I") is None
+
+
+def test_fetch_year_builds_parser_shaped_facts(sec_server):
+    results = FramesIngestor(client=SECClient(mode="live")).fetch_year(2023)
+
+    alpha = results["0000320193"]
+    assert alpha["balance_sheet"] == {
+        "total_assets": 1000,
+        # The first alt tag wins over later ones for the same company
+        "current_assets": 400,
+        "current_liabilities": 100,
+        "total_liabilities": 300,
+    }
+    assert alpha["income_statement"] == {"revenue_current": 900, "revenue_last": 800, "revenue": 900}
+    assert alpha["fiscal_years"] == {"current_year": 2023, "prior_year": 2022}
+
+    beta = results["0000789019"]
+    assert beta["balance_sheet"]["current_assets"] == 200
+    # No Liabilities frame row: rebuilt from current + noncurrent
+    assert beta["balance_sheet"]["total_liabilities"] == 200
+    # Both revenue years come from the tag that had the current value
+    assert beta["income_statement"] == {"revenue_current": 100, "revenue": 100}
+    assert beta["fiscal_years"]["prior_year"] is None
+
+
+def test_replay_returns_none_for_recorded_404(sec_server, tmp_path, monkeypatch):
+    recorder = SECClient(mode="record", archive_dir=str(tmp_path))
+    assert recorder.get_frame("NotATag", "CY2023Q4I") is None
+    recorded = FramesIngestor(client=recorder).fetch_year(2023)
+
+    # Reload the archive from disk rather than reusing the recorder's copy
+    monkeypatch.setattr(sec_client, "_archives", {})
+    requests_before = len(sec_server.requests)
+    replayer = SECClient(mode="replay", archive_dir=str(tmp_path))
+    assert replayer.get_frame("NotATag", "CY2023Q4I") is None
+    assert FramesIngestor(client=replayer).fetch_year(2023) == recorded
+    assert len(sec_server.requests) == requests_before
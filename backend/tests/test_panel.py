@@ -0,0 +1,29 @@
+from src.backtest.panel import company_rows
+
+ALT_TAGS = {
+    "income_statement_tags": {
+        "revenue": ["Revenues"],
+        "net_income": ["ProfitLoss", "NetIncomeLoss"],
+    },
+}
+
+
+def _fact(fy, val, filed):
+    return {"fy": fy, "form": "10-K", "end": f"{fy}-12-31", "filed": filed, "val": val}
+
+
+def test_multi_year_fields_take_both_years_from_one_tag():
+    company_facts = {
+        "cik": 320193,
+        "facts": {"us-gaap": {
+            "Revenues": {"units": {"USD": [_fact(2022, 800, "2023-02-01"), _fact(2023, 900, "2024-02-01")]}},
+            "ProfitLoss": {"units": {"USD": [_fact(2023, 100, "2024-02-01")]}},
+            "NetIncomeLoss": {"units": {"USD": [_fact(2022, 80, "2023-02-01"), _fact(2023, 95, "2024-02-01")]}},
+        }},
+    }
+
+    latest = company_rows(company_facts, ALT_TAGS)[-1]
+
+    assert (latest["revenue_current"], latest["revenue_last"]) == (900, 800)
+    # ProfitLoss has no 2022 value; NetIncomeLoss's 2022 value must not be paired with it
+    assert (latest["net_income_current"], latest["net_income_last"]) == (100, None)
@@ -0,0 +1,19 @@
+from src.monitoring import profiling
+from src.monitoring.metrics import stage
+
+MB = 1024 * 1024
+
+
+def test_peak_total_covers_allocations_before_tracked_stages(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+
+    def work():
+        buffer = bytearray(20 * MB)
+        del buffer
+        with stage("parse"):
+            return [0] * 1000
+
+    _, report = profiling.run_profiled(work)
+
+    assert report["peak_total"] >= 20 * MB
+    assert report["peak_allocations"]["parse"] < MB
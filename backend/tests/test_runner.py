@@ -0,0 +1,25 @@
+import json
+
+from src.scorer.runner import Checkpoint
+
+
+def test_checkpoint_resumes_past_a_torn_line(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    checkpoint = Checkpoint(path)
+    checkpoint.record(["A"], {"offset": 10})
+    checkpoint.close()
+    with open(path, "a") as f:
+        f.write('{"tickers": ["B"], "outp')
+
+    resumed = Checkpoint(path)
+    assert resumed.done == {"A"}
+    resumed.record(["C"], {"offset": 20})
+    resumed.record(["D"], {"offset": 30})
+    resumed.close()
+
+    again = Checkpoint(path)
+    again.close()
+    assert again.done == {"A", "C", "D"}
+    assert again.markers[-1] == {"offset": 30}
+    with open(path) as f:
+        assert [json.loads(line)["tickers"] for line in f] == [["A"], ["C"], ["D"]]
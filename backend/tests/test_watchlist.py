@@ -0,0 +1,58 @@
+from src.scoring.score_store import ScoreStore
+from src.watchlist.scheduler import ALERT_INTERVALS, WatchlistScheduler
+
+
+def _scheduler():
+    return WatchlistScheduler(evaluate=lambda ticker: None, clock=lambda: 0.0)
+
+
+def test_held_ticker_is_unwatched_after_last_release():
+    scheduler = _scheduler()
+    scheduler.hold("aaa")
+    scheduler.hold("AAA")
+
+    scheduler.release("AAA")
+    assert "AAA" in scheduler
+
+    scheduler.release("AAA")
+    assert "AAA" not in scheduler
+    assert len(scheduler) == 0
+
+
+def test_release_keeps_explicitly_watched_ticker():
+    scheduler = _scheduler()
+    scheduler.add("AAA")
+    scheduler.hold("AAA")
+    scheduler.hold("BBB")
+
+    scheduler.release("AAA")
+    scheduler.release("BBB")
+
+    assert "AAA" in scheduler
+    assert "BBB" not in scheduler
+
+
+def test_remove_waits_for_open_holds():
+    scheduler = _scheduler()
+    scheduler.add("AAA")
+    scheduler.hold("AAA")
+
+    assert scheduler.remove("AAA")
+    assert "AAA" in scheduler
+
+    scheduler.release("AAA")
+    assert "AAA" not in scheduler
+
+
+def test_hold_schedules_a_stored_score_at_its_cadence():
+    store = ScoreStore()
+    store.put({"cik": "0000320193", "score": 30.0, "grade": "B", "alert_level": "Weekly", "scored_at": 1000.0})
+    scheduler = WatchlistScheduler(evaluate=lambda ticker: None, store=store, clock=lambda: 2000.0)
+
+    entry = scheduler.hold("AAA", "0000320193")
+    assert entry["grade"] == "B"
+    assert entry["next_check"] == 1000.0 + ALERT_INTERVALS["Weekly"]
+    assert scheduler.next_due() == 1000.0 + ALERT_INTERVALS["Weekly"]
+
+    # Without a stored score the ticker is due right away
+    assert scheduler.hold("BBB", "0000789019")["next_check"] == 2000.0
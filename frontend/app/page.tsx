@@ -76,6 +76,29 @@ export default function Home() {
     }
   }, [companies, isInitialized])
 
+  // Subscribe to pushed score updates for the saved tickers
+  const tickerKey = companies.map(c => c.ticker.toUpperCase()).sort().join(',')
+  useEffect(() => {
+    if (!tickerKey) return
+
+    const source = new EventSource(`${API_URL}/scores/stream?tickers=${encodeURIComponent(tickerKey)}`)
+    source.addEventListener('score', (event) => {
+      const update: CompanyAnalysis = JSON.parse((event as MessageEvent).data)
+      setCompanies(prev => prev.map(c => {
+        // Stored scores are per company, so match on CIK and keep the saved share-class ticker
+        if (c.cik !== update.cik) return c
+        if (c.grade !== update.grade) {
+          toast.info(`${c.ticker} grade changed`, {
+            description: `${c.grade} → ${update.grade} - ${update.recommendation}`
+          })
+        }
+        return { ...update, ticker: c.ticker }
+      }))
+    })
+
+    return () => source.close()
+  }, [tickerKey])
+
   const analyzeTickers = async (tickers: string[]) => {
     // Remove duplicates (case-insensitive)
     const uniqueTickers = Array.from(new Set(tickers.map(t => t.toUpperCase())))